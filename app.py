@@ -1,21 +1,113 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import (Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response,
+                   send_file, g, abort)
 from datetime import datetime
 from functools import wraps
-import json
 import os
+import sqlite3
+import tempfile
 from werkzeug.utils import secure_filename
-from models import db, Admin, Team, Player, Match, Score, TeamSeeding, SpiritScore
+from sqlalchemy import func, insert, update, or_, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+from models import (db, Admin, Tournament, Team, Player, Match, Score, TeamSeeding, SpiritScore, ScheduleSlot,
+                    ACTION_CODES, ACTION_NAMES, ACTION_SCORE, ACTION_BLOCK, GOAL_ACTIONS,
+                    SPIRIT_CRITERIA)
+from migrations import upgrade as upgrade_schema
+from scheduling import generate_schedule, advance_schedule, ordinal, ScheduleError
+from standings import load_standings, load_spirit_standings
+from boxscore import get_box_score, invalidate_box_scores, player_stats
+from rosters import get_roster, invalidate_rosters
+from stats import events_players, record_event, rebuild_player_stats
+from rankings import load_rows, rank_rows, team_rankings, top_rows
+from compression import compress_response
+from assets import asset_url, responsive_image, cache_headers
+from db_routing import configure_routing, install_pragmas, install_read_routing, read_only
+from tournaments import (ensure_tournament, load_current_tournament, current_tournament,
+                         current_tournament_id, owning_tournament, scoped, scoped_or_404)
+from scoreboard import load_scoreboards, scoreboard_entry
+from livestate import LIVE
+from clock import clock_state, compact_clock, match_over, start_clock
+from metrics import REGISTRY as METRICS, install_metrics, count_queries
+from profiling import install_profiling, list_profiles, profile_path, profile_summary
+from archive import (ArchiveError, SNAPSHOT_ENVIRON, archive_tournament, archived_response, remove_archive,
+                     snapshot_match_id)
+from export import DATASETS as EXPORT_DATASETS, FORMATS as EXPORT_FORMATS, ExportError, csv_stream, write_parquet
 import openpyxl
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///frisbee.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///frisbee.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+# Public reads use a read-only pool; admin writes go through one writer connection
+if os.environ.get('READ_ROUTING', '1') != '0':
+    configure_routing(app)
 db.init_app(app)
+# Registered first so a profile covers every other request hook
+install_profiling(app)
+install_metrics(app)
+# Before the tournament lookup, so public reads resolve it on the read pool
+install_read_routing(app)
+app.add_template_filter(ordinal)
+
+app.add_template_global(asset_url)
+app.add_template_global(responsive_image)
+
+@app.before_request
+def select_tournament():
+    """Scope this request to the selected (or latest active) tournament"""
+    if request.endpoint != 'static':
+        load_current_tournament()
+
+@app.before_request
+def serve_archived():
+    """Public views of an archived tournament come from its snapshot files"""
+    if request.method != 'GET':
+        return None
+    match_id = snapshot_match_id(request.path)
+    if match_id is not None:
+        # Match views follow the match's tournament, not the one the visitor has selected
+        owner = db.session.query(Tournament.id, Tournament.status) \
+            .join(Match, Match.tournament_id == Tournament.id).filter(Match.id == match_id).first()
+        if owner and owner.status == 'archived':
+            return archived_response(owner.id, request.path, request.args)
+        return None
+    tournament = g.get('tournament')
+    if tournament and tournament.status == 'archived':
+        return archived_response(tournament.id, request.path, request.args)
+
+@app.context_processor
+def tournament_context():
+    """Current tournament and the full list, for the switcher in the nav"""
+    if request.endpoint == 'static':
+        return {}
+    if request.environ.get(SNAPSHOT_ENVIRON):
+        # Archived pages outlive the tournament list, so they leave the switcher out
+        return {'current_tournament': current_tournament(), 'tournaments': []}
+    return {
+        'current_tournament': current_tournament(),
+        'tournaments': Tournament.query.order_by(Tournament.id.desc()).all(),
+    }
+
+@app.after_request
+def compress_json(response):
+    """gzip/brotli JSON responses, negotiated via Accept-Encoding"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+@app.after_request
+def static_cache_headers(response):
+    """Cache fingerprinted build output forever"""
+    return cache_headers(response, request.path)
 
 # Create tables and default admin
 with app.app_context():
+    install_pragmas(db)
+    count_queries(db)
     db.create_all()
+    # Bring existing databases up to the current schema version
+    upgrade_schema(db.engine.url.database, verbose=False)
+    ensure_tournament()
+    # Live matches are polled from memory; load them back after a restart
+    LIVE.rebuild()
     # Create default admin if none exists
     if Admin.query.count() == 0:
         default_admin = Admin(username='admin')
@@ -31,148 +123,147 @@ def admin_required(f):
         if 'admin_id' not in session:
             flash('Please login to access the admin panel.', 'error')
             return redirect(url_for('admin_login'))
+        # An archived tournament is served from snapshots, so it must not change,
+        # whether it is the selected one or owns the match, team or player in the URL
+        if request.method == 'POST' and request.endpoint not in TOURNAMENT_ENDPOINTS:
+            for tournament in (g.get('tournament'), owning_tournament(request.view_args)):
+                if tournament and tournament.status == 'archived':
+                    flash(f"{tournament.name} is archived. Unarchive it to make changes.", 'error')
+                    return redirect(url_for('admin_tournaments'))
         return f(*args, **kwargs)
     return decorated_function
 
+# Endpoints that manage tournaments themselves, allowed while one is archived
+TOURNAMENT_ENDPOINTS = ('add_tournament', 'update_tournament_status', 'archive_tournament_route')
+
+ADMIN_PAGE_SIZE = 50
+
+def keyset_page(query, key_column, page_size=ADMIN_PAGE_SIZE):
+    """
+    Return one page of `query` ordered by `key_column`, using the `after` /
+    `before` request args as cursors instead of OFFSET.
+    Returns (rows, next_cursor, prev_cursor).
+    """
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    
+    if before is not None:
+        rows = query.filter(key_column < before).order_by(key_column.desc()).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = list(reversed(rows[:page_size]))
+        prev_cursor = getattr(rows[0], key_column.key) if has_more and rows else None
+        next_cursor = getattr(rows[-1], key_column.key) if rows else None
+    else:
+        if after is not None:
+            query = query.filter(key_column > after)
+        rows = query.order_by(key_column).limit(page_size + 1).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = getattr(rows[-1], key_column.key) if has_more else None
+        prev_cursor = getattr(rows[0], key_column.key) if after is not None and rows else None
+    
+    return rows, next_cursor, prev_cursor
+
 # ============ PUBLIC ROUTES ============
 
 @app.route('/leaderboard')
+@read_only
 def leaderboard():
     """Public leaderboard with team filtering"""
-    teams = Team.query.all()
+    tournament_id = current_tournament_id()
+    teams = scoped(Team).all()
     selected_team_id = request.args.get('team', type=int)
     
-    players = Player.query.all()
-    
-    # Build leaderboards with rankings
-    scoring_data = []
-    assist_data = []
-    
-    for player in players:
-        total_points = sum(score.points for score in player.scores if score.action_type == 'score')
-        total_assists = player.assists.count()
-        
-        scoring_data.append({
-            'player': player,
-            'value': total_points,
-            'team': player.team
-        })
-        
-        assist_data.append({
-            'player': player,
-            'value': total_assists,
-            'team': player.team
-        })
-    
-    # Sort all leaderboards
-    scoring_data.sort(key=lambda x: -x['value'])
-    assist_data.sort(key=lambda x: -x['value'])
-    
-    # Add global and team ranks
-    for idx, entry in enumerate(scoring_data):
-        entry['global_rank'] = idx + 1
-        entry['team_rank'] = None
-    for idx, entry in enumerate(assist_data):
-        entry['global_rank'] = idx + 1
-        entry['team_rank'] = None
-    
-    # Calculate team ranks
-    for team in teams:
-        team_score_players = [e for e in scoring_data if e['team'].id == team.id]
-        team_score_players.sort(key=lambda x: -x['value'])
-        for idx, entry in enumerate(team_score_players):
-            entry['team_rank'] = idx + 1
-        
-        team_assist_players = [e for e in assist_data if e['team'].id == team.id]
-        team_assist_players.sort(key=lambda x: -x['value'])
-        for idx, entry in enumerate(team_assist_players):
-            entry['team_rank'] = idx + 1
-    
-    # Filter by selected team
     if selected_team_id:
-        scoring_data = [e for e in scoring_data if e['team'].id == selected_team_id]
-        assist_data = [e for e in assist_data if e['team'].id == selected_team_id]
+        # Only that team's players are read; their global ranks are counted in SQL
+        scoring_data, assist_data, defense_data = (team_rankings(stat, tournament_id, selected_team_id)
+                                                   for stat in ('goals', 'assists', 'blocks'))
+    else:
+        # One projection query of compact rows, ranked in Python per stat
+        rows = load_rows(tournament_id)
+        scoring_data, assist_data, defense_data = (rank_rows(rows, stat)
+                                                   for stat in ('goals', 'assists', 'blocks'))
     
     return render_template('leaderboard.html',
                          teams=teams,
                          selected_team_id=selected_team_id,
                          scoring_data=scoring_data,
-                         assist_data=assist_data)
+                         assist_data=assist_data,
+                         defense_data=defense_data)
 
 @app.route('/')
+@read_only
 def index():
     """Main public view showing current matches and leaderboard"""
-    matches = Match.query.order_by(Match.match_date.desc()).all()
-    
-    # Get all leaderboards
-    players = Player.query.all()
+    matches = scoped(Match).order_by(Match.match_date.desc()).all()
     
-    # Scoring leaderboard
-    scoring_leaderboard = []
-    # Assist leaderboard
-    assist_leaderboard = []
-    
-    for player in players:
-        total_points = sum(score.points for score in player.scores if score.action_type == 'score')
-        total_assists = player.assists.count()
-        
-        scoring_leaderboard.append({
-            'player': player,
-            'total_points': total_points,
-            'team': player.team
-        })
-        
-        assist_leaderboard.append({
-            'player': player,
-            'total_assists': total_assists,
-            'team': player.team
-        })
-    
-    scoring_leaderboard.sort(key=lambda x: x['total_points'], reverse=True)
-    assist_leaderboard.sort(key=lambda x: x['total_assists'], reverse=True)
+    # Top ten of each leaderboard as compact rows, straight from the indexed player_stat columns
+    scoring_leaderboard = top_rows(current_tournament_id(), 'goals')
+    assist_leaderboard = top_rows(current_tournament_id(), 'assists')
     
     return render_template('index.html', 
                          matches=matches, 
-                         scoring_leaderboard=scoring_leaderboard[:10],
-                         assist_leaderboard=assist_leaderboard[:10])
+                         scoring_leaderboard=scoring_leaderboard,
+                         assist_leaderboard=assist_leaderboard)
 
 @app.route('/match/<int:match_id>')
+@read_only
 def match_detail(match_id):
     """Live view of a specific match"""
     match = Match.query.get_or_404(match_id)
-    scores = Score.query.filter_by(match_id=match_id).order_by(Score.timestamp.desc()).all()
-    return render_template('match_detail.html', match=match, scores=scores)
+    scores = match_events(match_id)
+    box = get_box_score(match)
+    return render_template('match_detail.html',
+                         match=match,
+                         clock=clock_state(match),
+                         scores=scores,
+                         team1_players=box['team1_players'],
+                         team2_players=box['team2_players'])
+
+@app.route('/api/match/<int:match_id>/boxscore')
+@read_only
+def get_match_boxscore(match_id):
+    """API endpoint for per-player goals, assists, defenses and plus/minus"""
+    state = LIVE.get(match_id)
+    if state is None:
+        abort(404)
+    return jsonify(state.box)
 
 @app.route('/api/match/<int:match_id>/scores')
+@read_only
 def get_match_scores(match_id):
-    """API endpoint for live score updates"""
-    match = Match.query.get_or_404(match_id)
-    scores = Score.query.filter_by(match_id=match_id).order_by(Score.timestamp.desc()).all()
+    """
+    API endpoint for live score updates, served from the in-memory live
+    state (see livestate.py). ?v=2 selects the compact payload: short keys,
+    integer ids and epoch timestamps. Names live in dictionaries (players 'p',
+    teams 't', action types 'a') that are sent only when the roster key 'k'
+    differs from the one the client passes back as ?r=.
+      s: [team1_score, team2_score]   o/d: offense/defense team id
+      c: [start, soft_cap, hard_cap, cap, target] (see clock.clock_state)
+      b: [player_id, goals, assists, defenses, turnovers, plus_minus] per player
+      e: [id, player_id, action_code, points, epoch_seconds, assist_id] per event
+    """
+    state = LIVE.get(match_id)
+    if state is None:
+        abort(404)
+    METRICS.poll(match_id, f"{request.remote_addr}|{request.user_agent.string}")
     
-    # Get current ratios for both teams
-    current_ratios = match.get_current_ratio()
+    if request.args.get('v', type=int) == 2:
+        roster_key = request.args.get('r')
+        METRICS.cache_result('roster', roster_key == state.roster_key)
+        return jsonify(state.compact_payload(roster_key))
     
-    return jsonify({
-        'team1_score': match.team1_score,
-        'team2_score': match.team2_score,
-        'status': match.status,
-        'current_offense_team_id': match.current_offense_team_id,
-        'current_defense_team_id': match.current_defense_team_id,
-        'total_points': match.total_points_played,
-        'team1_ratio': current_ratios['team1'],
-        'team2_ratio': current_ratios['team2'],
-        'scores': [{
-            'id': score.id,
-            'player_name': score.player.name,
-            'team_name': score.player.team.name,
-            'action_type': score.action_type,
-            'points': score.points,
-            'timestamp': score.timestamp.strftime('%H:%M:%S'),
-            'assist_by': score.assist_by.name if score.assist_by else None
-        } for score in scores]
-    })
+    return jsonify(state.payload)
+
+def match_events(match_id):
+    """Scoring events for a match, newest first, with players and teams loaded"""
+    return Score.query.filter_by(match_id=match_id) \
+        .options(joinedload(Score.player).joinedload(Player.team),
+                 joinedload(Score.assist_by)) \
+        .order_by(Score.timestamp.desc()).all()
 
 @app.route('/api/match/<int:match_id>/ratio')
+@read_only
 def get_match_ratio(match_id):
     """API endpoint for current gender ratio"""
     match = Match.query.get_or_404(match_id)
@@ -181,187 +272,124 @@ def get_match_ratio(match_id):
         'total_points': match.total_points_played or 0
     })
 
+@app.route('/api/scoreboard')
+@read_only
+def get_scoreboard():
+    """
+    Compact scoreboards of every live match, or of ?ids=1,2,3, from one query
+    (see scoreboard.scoreboard_entry). 'a' maps action codes to names.
+    """
+    match_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip().isdigit()]
+    rows = load_scoreboards(current_tournament_id(), match_ids)
+    client = f"{request.remote_addr}|{request.user_agent.string}"
+    for row in rows:
+        if row[0].status == 'live':
+            METRICS.poll(row[0].id, client)
+    return jsonify({'a': ACTION_NAMES, 'm': [scoreboard_entry(*row) for row in rows]})
+
+@app.route('/display')
+@read_only
+def scoreboard_display():
+    """Fullscreen scoreboard of all live matches (or ?ids=1,2,3) for venue screens"""
+    return render_template('display.html', match_ids=request.args.get('ids', ''))
+
 @app.route('/standings')
+@read_only
 def standings():
-    """Public standings page with tabs for current, initial, and spirit rankings"""
-    teams = Team.query.all()
-    completed_matches = Match.query.filter_by(status='completed').all()
-    
-    # Define stage priority for standings (higher number = higher placement)
-    stage_priority = {
-        'Finals': 100,           # Winner = 1st, Loser = 2nd
-        '3rd Place Game': 50,    # Winner = 3rd, Loser = 4th
-        '5th Place Game': 25,    # Winner = 5th, Loser = 6th
-        'Cross Pool': 10,        # Regular calculation
-        'Pool Stage': 10         # Regular calculation
-    }
-    
-    # Current standings - calculated from match results with stage awareness
-    current_standings = []
-    
-    for team in teams:
-        wins = 0
-        losses = 0
-        point_differential = 0
-        final_placement = None
-        placement_priority = 0
-        
-        for match in completed_matches:
-            if match.team1_id == team.id:
-                score_diff = match.team1_score - match.team2_score
-                point_differential += score_diff
-                won = match.team1_score > match.team2_score
-                
-                if won:
-                    wins += 1
-                else:
-                    losses += 1
-                
-                # Check if this is a placement match
-                stage = match.match_stage or 'Pool Stage'
-                if stage in ['Finals', '3rd Place Game', '5th Place Game']:
-                    if stage == 'Finals':
-                        final_placement = 1 if won else 2
-                        placement_priority = 200 if won else 199
-                    elif stage == '3rd Place Game':
-                        final_placement = 3 if won else 4
-                        placement_priority = 150 if won else 149
-                    elif stage == '5th Place Game':
-                        final_placement = 5 if won else 6
-                        placement_priority = 100 if won else 99
-                        
-            elif match.team2_id == team.id:
-                score_diff = match.team2_score - match.team1_score
-                point_differential += score_diff
-                won = match.team2_score > match.team1_score
-                
-                if won:
-                    wins += 1
-                else:
-                    losses += 1
-                
-                # Check if this is a placement match
-                stage = match.match_stage or 'Pool Stage'
-                if stage in ['Finals', '3rd Place Game', '5th Place Game']:
-                    if stage == 'Finals':
-                        final_placement = 1 if won else 2
-                        placement_priority = 200 if won else 199
-                    elif stage == '3rd Place Game':
-                        final_placement = 3 if won else 4
-                        placement_priority = 150 if won else 149
-                    elif stage == '5th Place Game':
-                        final_placement = 5 if won else 6
-                        placement_priority = 100 if won else 99
-        
-        current_standings.append({
-            'team': team,
-            'wins': wins,
-            'losses': losses,
-            'point_diff': point_differential,
-            'final_placement': final_placement,
-            'placement_priority': placement_priority
-        })
-    
-    # Sort: first by placement priority (if any), then by wins, then by point differential
-    current_standings.sort(key=lambda x: (-x['placement_priority'], -x['wins'], -x['point_diff']))
+    """Public standings page with tabs for current, pool, initial, and spirit rankings"""
+    # Current standings and pool tables, with WFDF tiebreakers
+    tournament_id = current_tournament_id()
+    result = load_standings(tournament_id)
+    current_standings = result['overall']
+    pool_standings = result['pools']
     
     # Initial standings - from seedings
-    initial_standings = []
-    for team in teams:
-        seeding = TeamSeeding.query.filter_by(team_id=team.id).first()
-        if seeding:
-            initial_standings.append({
-                'team': team,
-                'seed': seeding.seeding_rank
-            })
-    initial_standings.sort(key=lambda x: x['seed'])
+    initial_standings = [
+        {'team_name': name, 'seed': rank}
+        for name, rank in db.session.query(Team.name, TeamSeeding.seeding_rank)
+        .join(TeamSeeding, TeamSeeding.team_id == Team.id)
+        .filter(Team.tournament_id == tournament_id)
+        .order_by(TeamSeeding.seeding_rank).all()
+    ]
     
     # Spirit standings - average spirit scores
-    spirit_standings = []
-    for team in teams:
-        spirit_scores_received = SpiritScore.query.filter_by(receiving_team_id=team.id).all()
-        
-        if spirit_scores_received:
-            average_scores = {
-                'rules_knowledge': 0,
-                'fouls_contact': 0,
-                'fair_mindedness': 0,
-                'positive_attitude': 0,
-                'communication': 0,
-                'overall': 0
-            }
-            
-            for score_obj in spirit_scores_received:
-                average_scores['rules_knowledge'] += score_obj.rules_knowledge
-                average_scores['fouls_contact'] += score_obj.fouls_contact
-                average_scores['fair_mindedness'] += score_obj.fair_mindedness
-                average_scores['positive_attitude'] += score_obj.positive_attitude
-                average_scores['communication'] += score_obj.communication
-            
-            count = len(spirit_scores_received)
-            for key in average_scores:
-                if key != 'overall':
-                    average_scores[key] = round(average_scores[key] / count, 2)
-            
-            average_scores['overall'] = round(sum([v for k, v in average_scores.items() if k != 'overall']) / 5, 2)
-            
-            spirit_standings.append({
-                'team': team,
-                'match_count': count,
-                'scores': average_scores
-            })
-    
-    spirit_standings.sort(key=lambda x: -x['scores']['overall'])
+    spirit_standings = load_spirit_standings(tournament_id)
     
     return render_template('standings.html',
                          current_standings=current_standings,
+                         pool_standings=pool_standings,
                          initial_standings=initial_standings,
                          spirit_standings=spirit_standings)
 
+@app.route('/api/standings')
+@read_only
+def get_standings_api():
+    """API endpoint for current and pool standings"""
+    return jsonify(load_standings(current_tournament_id()))
+
 @app.route('/spirit-form', methods=['GET', 'POST'])
+@read_only
 def spirit_form():
     """Spirit of the Game form page"""
     if request.method == 'POST':
-        match_id = request.form.get('match_id')
-        giving_team_id = request.form.get('giving_team_id')
-        receiving_team_id = request.form.get('receiving_team_id')
+        match_id = request.form.get('match_id', type=int)
+        giving_team_id = request.form.get('giving_team_id', type=int)
+        receiving_team_id = request.form.get('receiving_team_id', type=int)
         day = request.form.get('day')
         stage = request.form.get('stage')
         
         # Get scores from form
-        rules_knowledge = int(request.form.get('rules_knowledge', 3))
-        fouls_contact = int(request.form.get('fouls_contact', 3))
-        fair_mindedness = int(request.form.get('fair_mindedness', 3))
-        positive_attitude = int(request.form.get('positive_attitude', 3))
-        communication = int(request.form.get('communication', 3))
+        criteria = {c: request.form.get(c, 3, type=int) for c in SPIRIT_CRITERIA}
         
         mvp_names = request.form.get('mvp_names', '').strip()
         msp_names = request.form.get('msp_names', '').strip()
         feedback = request.form.get('feedback', '').strip()
         
         if match_id and giving_team_id and receiving_team_id:
-            spirit_score = SpiritScore(
-                match_id=int(match_id),
-                giving_team_id=int(giving_team_id),
-                receiving_team_id=int(receiving_team_id),
-                day=day,
-                stage=stage,
-                rules_knowledge=rules_knowledge,
-                fouls_contact=fouls_contact,
-                fair_mindedness=fair_mindedness,
-                positive_attitude=positive_attitude,
-                communication=communication,
-                mvp_names=mvp_names,
-                msp_names=msp_names,
-                feedback=feedback
-            )
-            db.session.add(spirit_score)
-            db.session.commit()
-            flash('Spirit score submitted successfully!', 'success')
-            return redirect(url_for('spirit_form'))
+            # The match must be completed and played between exactly these two teams
+            match = Match.query.filter(
+                Match.id == match_id,
+                Match.status == 'completed',
+                or_(
+                    and_(Match.team1_id == giving_team_id, Match.team2_id == receiving_team_id),
+                    and_(Match.team1_id == receiving_team_id, Match.team2_id == giving_team_id),
+                )
+            ).first()
+            
+            if not match:
+                flash('Your team and the opposing team must be the two teams of the selected completed match.', 'error')
+            elif any(value is None or not 1 <= value <= 5 for value in criteria.values()):
+                flash('Each spirit criterion must be scored from 1 to 5.', 'error')
+            else:
+                values = dict(
+                    tournament_id=match.tournament_id,
+                    match_id=match_id,
+                    giving_team_id=giving_team_id,
+                    receiving_team_id=receiving_team_id,
+                    day=day,
+                    stage=stage,
+                    mvp_names=mvp_names,
+                    msp_names=msp_names,
+                    feedback=feedback,
+                    updated_at=datetime.utcnow(),
+                    **criteria
+                )
+                # A resubmission replaces the team's earlier score for the match,
+                # keeping its id and created_at; updated_at marks it for re-export
+                stmt = sqlite_insert(SpiritScore).values(created_at=values['updated_at'], **values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[SpiritScore.match_id, SpiritScore.giving_team_id],
+                    set_={k: v for k, v in values.items() if k not in ('match_id', 'giving_team_id')}
+                )
+                db.session.execute(stmt)
+                db.session.commit()
+                flash('Spirit score submitted successfully!', 'success')
+                return redirect(url_for('spirit_form'))
+        else:
+            flash('Please select the match and both teams.', 'error')
     
-    teams = Team.query.all()
-    completed_matches = Match.query.filter_by(status='completed').all()
+    teams = scoped(Team).all()
+    completed_matches = scoped(Match).filter_by(status='completed').all()
     
     return render_template('spirit_form.html', teams=teams, matches=completed_matches)
 
@@ -369,77 +397,140 @@ def spirit_form():
 @admin_required
 def admin_seeding():
     """Admin page to set tournament seedings"""
-    teams = Team.query.all()
+    teams = scoped(Team).all()
+    
+    # Get existing seedings in one query
+    seedlings = {team_id: rank for team_id, rank in
+                 scoped(TeamSeeding).with_entities(TeamSeeding.team_id, TeamSeeding.seeding_rank).all()}
     
-    # Get existing seedlings
-    seedlings = {}
-    for team in teams:
-        seeding = TeamSeeding.query.filter_by(team_id=team.id).first()
-        seedlings[team.id] = seeding.seeding_rank if seeding else None
+    # Seeded teams first in seed order, then unseeded teams by name
+    teams.sort(key=lambda t: (seedlings.get(t.id) is None, seedlings.get(t.id) or 0, t.name))
     
     return render_template('admin/seeding.html', teams=teams, seedlings=seedlings)
 
+def validate_seeding(ranks, valid_team_ids):
+    """
+    Check a {team_id: rank} map in one pass: known teams, positive integer
+    ranks, no duplicates, and ranks forming 1..N with no gaps.
+    Returns a list of error messages.
+    """
+    errors = []
+    teams_by_rank = {}
+    
+    for team_id, rank in ranks.items():
+        if team_id not in valid_team_ids:
+            errors.append(f'Unknown team id {team_id}')
+        if rank < 1:
+            errors.append(f'Seed rank must be 1 or higher (got {rank})')
+        elif rank in teams_by_rank:
+            errors.append(f'Seed #{rank} is assigned to more than one team')
+        teams_by_rank.setdefault(rank, team_id)
+    
+    missing = [rank for rank in range(1, len(ranks) + 1) if rank not in teams_by_rank]
+    if missing and not errors:
+        errors.append(f'Seed ranks must run 1 to {len(ranks)} without gaps (missing: {", ".join(map(str, missing))})')
+    
+    return errors
+
 @app.route('/admin/seeding/update', methods=['POST'])
 @admin_required
 def update_seeding():
-    """Update team seedings"""
-    teams_data = request.get_json()
+    """Replace team seedings with the submitted {team_id: rank} map"""
+    teams_data = request.get_json() or {}
     
-    for team_id, seed_rank in teams_data.items():
-        team_id = int(team_id)
-        seeding = TeamSeeding.query.filter_by(team_id=team_id).first()
-        
-        if seeding and seed_rank:
-            seeding.seeding_rank = int(seed_rank)
-        elif seed_rank and not seeding:
-            new_seeding = TeamSeeding(team_id=team_id, seeding_rank=int(seed_rank))
-            db.session.add(new_seeding)
-        elif seeding and not seed_rank:
-            db.session.delete(seeding)
+    try:
+        ranks = {int(team_id): int(rank) for team_id, rank in teams_data.items() if rank not in (None, '')}
+    except (TypeError, ValueError):
+        return jsonify({'status': 'error', 'errors': ['Team ids and seed ranks must be whole numbers']}), 400
+    
+    tournament_id = current_tournament_id()
+    valid_team_ids = {team_id for (team_id,) in scoped(Team).with_entities(Team.id).all()}
+    errors = validate_seeding(ranks, valid_team_ids)
+    if errors:
+        return jsonify({'status': 'error', 'errors': errors}), 400
+    
+    # Diff against all existing seedings, loaded in one query
+    existing = {seeding.team_id: seeding for seeding in scoped(TeamSeeding).all()}
+    
+    removed = [team_id for team_id in existing if team_id not in ranks]
+    updates = [{'id': existing[team_id].id, 'seeding_rank': rank}
+               for team_id, rank in ranks.items()
+               if team_id in existing and existing[team_id].seeding_rank != rank]
+    inserts = [{'tournament_id': tournament_id, 'team_id': team_id, 'seeding_rank': rank}
+               for team_id, rank in ranks.items() if team_id not in existing]
+    
+    if removed:
+        TeamSeeding.query.filter(TeamSeeding.team_id.in_(removed)).delete(synchronize_session=False)
+    if updates:
+        db.session.execute(update(TeamSeeding), updates)
+    if inserts:
+        db.session.execute(insert(TeamSeeding), inserts)
     
     db.session.commit()
     return jsonify({'status': 'success'})
 
+@app.route('/admin/seeding/reorder', methods=['POST'])
+@admin_required
+def reorder_seeding():
+    """Move one team to a new seed, shifting the teams in between"""
+    data = request.get_json() or {}
+    try:
+        team_id = int(data.get('team_id'))
+        new_rank = int(data.get('new_rank'))
+    except (TypeError, ValueError):
+        return jsonify({'status': 'error', 'errors': ['team_id and new_rank are required']}), 400
+    
+    tournament_id = current_tournament_id()
+    team = db.session.get(Team, team_id)
+    if not team or team.tournament_id != tournament_id:
+        return jsonify({'status': 'error', 'errors': [f'Unknown team id {team_id}']}), 404
+    
+    seeded_count = scoped(TeamSeeding).count()
+    seeding = TeamSeeding.query.filter_by(team_id=team_id).first()
+    
+    if seeding:
+        old_rank = seeding.seeding_rank
+        new_rank = max(1, min(new_rank, seeded_count))
+        # Shift every team between the old and new position with one UPDATE
+        if new_rank > old_rank:
+            shift = (TeamSeeding.seeding_rank > old_rank) & (TeamSeeding.seeding_rank <= new_rank)
+            delta = -1
+        else:
+            shift = (TeamSeeding.seeding_rank >= new_rank) & (TeamSeeding.seeding_rank < old_rank)
+            delta = 1
+        if new_rank != old_rank:
+            db.session.execute(
+                update(TeamSeeding)
+                .where(TeamSeeding.tournament_id == tournament_id, shift)
+                .values(seeding_rank=TeamSeeding.seeding_rank + delta)
+                .execution_options(synchronize_session=False)
+            )
+            seeding.seeding_rank = new_rank
+    else:
+        # Newly seeded team: insert at new_rank and push the rest down
+        new_rank = max(1, min(new_rank, seeded_count + 1))
+        db.session.execute(
+            update(TeamSeeding)
+            .where(TeamSeeding.tournament_id == tournament_id, TeamSeeding.seeding_rank >= new_rank)
+            .values(seeding_rank=TeamSeeding.seeding_rank + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.add(TeamSeeding(tournament_id=tournament_id, team_id=team_id, seeding_rank=new_rank))
+    
+    db.session.commit()
+    
+    seedings = scoped(TeamSeeding).with_entities(TeamSeeding.team_id, TeamSeeding.seeding_rank) \
+        .order_by(TeamSeeding.seeding_rank).all()
+    return jsonify({
+        'status': 'success',
+        'seedings': [{'team_id': t, 'seeding_rank': r} for t, r in seedings]
+    })
+
 @app.route('/api/standings/spirit')
+@read_only
 def get_spirit_standings_api():
     """API endpoint for spirit standings (for updates)"""
-    teams = Team.query.all()
-    spirit_standings = []
-    
-    for team in teams:
-        spirit_scores_received = SpiritScore.query.filter_by(receiving_team_id=team.id).all()
-        
-        if spirit_scores_received:
-            average_scores = {
-                'rules_knowledge': 0,
-                'fouls_contact': 0,
-                'fair_mindedness': 0,
-                'positive_attitude': 0,
-                'communication': 0
-            }
-            
-            for score_obj in spirit_scores_received:
-                average_scores['rules_knowledge'] += score_obj.rules_knowledge
-                average_scores['fouls_contact'] += score_obj.fouls_contact
-                average_scores['fair_mindedness'] += score_obj.fair_mindedness
-                average_scores['positive_attitude'] += score_obj.positive_attitude
-                average_scores['communication'] += score_obj.communication
-            
-            count = len(spirit_scores_received)
-            for key in average_scores:
-                average_scores[key] = round(average_scores[key] / count, 2)
-            
-            overall = round(sum(average_scores.values()) / 5, 2)
-            
-            spirit_standings.append({
-                'team_id': team.id,
-                'team_name': team.name,
-                'match_count': count,
-                'overall': overall,
-                'scores': average_scores
-            })
-    
-    spirit_standings.sort(key=lambda x: -x['overall'])
+    spirit_standings = load_spirit_standings(current_tournament_id())
     return jsonify(spirit_standings)
 
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -477,25 +568,143 @@ def admin_logout():
 @admin_required
 def admin_dashboard():
     """Admin dashboard home"""
-    teams_count = Team.query.count()
-    players_count = Player.query.count()
-    matches_count = Match.query.count()
-    live_matches = Match.query.filter_by(status='live').all()
+    teams_count = scoped(Team).count()
+    players_count = scoped(Player).count()
+    matches_count = scoped(Match).count()
+    live_matches = scoped(Match).filter_by(status='live').all()
+    slow_requests = list_profiles(limit=10) if app.config['PROFILING'] else []
     
     return render_template('admin/dashboard.html', 
                          teams_count=teams_count,
                          players_count=players_count,
                          matches_count=matches_count,
-                         live_matches=live_matches)
+                         live_matches=live_matches,
+                         profiling=app.config['PROFILING'],
+                         slow_requests=slow_requests,
+                         metrics=METRICS.summary())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics, for a scraper on this machine or a logged-in admin"""
+    if request.remote_addr not in ('127.0.0.1', '::1') and 'admin_id' not in session:
+        abort(403)
+    return Response(METRICS.prometheus(), mimetype='text/plain; version=0.0.4')
+
+# --- PROFILING ---
+
+@app.route('/admin/profiles')
+@admin_required
+def admin_profiles():
+    """Slowest recently profiled requests"""
+    return render_template('admin/profiles.html',
+                         profiling=app.config['PROFILING'],
+                         profiles=list_profiles())
+
+@app.route('/admin/profiles/<name>')
+@admin_required
+def download_profile(name):
+    """Download a saved profile; ?view=1 shows a cProfile summary as text"""
+    path = profile_path(name)
+    if path is None:
+        flash('Profile not found.', 'error')
+        return redirect(url_for('admin_profiles'))
+    if request.args.get('view') and name.endswith('.prof'):
+        return Response(profile_summary(path), mimetype='text/plain')
+    return send_file(os.path.abspath(path), as_attachment=not request.args.get('view'), download_name=name)
+
+# --- TOURNAMENTS ---
+
+@app.route('/admin/tournaments')
+@admin_required
+def admin_tournaments():
+    """List tournaments; the selected one scopes every other admin page"""
+    tournaments = Tournament.query.order_by(Tournament.id.desc()).all()
+    team_counts = dict(db.session.query(Team.tournament_id, func.count(Team.id)).group_by(Team.tournament_id).all())
+    match_counts = dict(db.session.query(Match.tournament_id, func.count(Match.id)).group_by(Match.tournament_id).all())
+    return render_template('admin/tournaments.html',
+                         tournaments=tournaments,
+                         team_counts=team_counts,
+                         match_counts=match_counts)
+
+@app.route('/admin/tournaments/add', methods=['POST'])
+@admin_required
+def add_tournament():
+    """Create a tournament and switch to it"""
+    name = request.form.get('name', '').strip()
+    start_date = request.form.get('start_date')
+    if not name:
+        flash('Please give the tournament a name.', 'error')
+    elif Tournament.query.filter_by(name=name).first():
+        flash(f"Tournament '{name}' already exists.", 'error')
+    else:
+        tournament = Tournament(
+            name=name,
+            start_date=datetime.fromisoformat(start_date).date() if start_date else None,
+            status='active'
+        )
+        db.session.add(tournament)
+        db.session.commit()
+        session['tournament_id'] = tournament.id
+        flash(f"Tournament '{name}' created.", 'success')
+    return redirect(url_for('admin_tournaments'))
+
+@app.route('/admin/tournaments/<int:tournament_id>/status', methods=['POST'])
+@admin_required
+def update_tournament_status(tournament_id):
+    """Mark a tournament active or completed; this also unarchives it"""
+    tournament = Tournament.query.get_or_404(tournament_id)
+    status = request.form.get('status')
+    if status in ('active', 'completed'):
+        if tournament.status == 'archived':
+            remove_archive(tournament.id)
+        tournament.status = status
+        db.session.commit()
+    return redirect(url_for('admin_tournaments'))
+
+@app.route('/admin/tournaments/<int:tournament_id>/archive', methods=['POST'])
+@admin_required
+def archive_tournament_route(tournament_id):
+    """Freeze a completed tournament's public pages into snapshot files"""
+    tournament = Tournament.query.get_or_404(tournament_id)
+    try:
+        count = archive_tournament(app, tournament.id)
+    except ArchiveError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+    else:
+        flash(f"{tournament.name} archived ({count} pages).", 'success')
+    return redirect(url_for('admin_tournaments'))
 
 # --- TEAM MANAGEMENT ---
 
 @app.route('/admin/teams')
 @admin_required
 def admin_teams():
-    """View all teams"""
-    teams = Team.query.all()
-    return render_template('admin/teams.html', teams=teams)
+    """View teams, paginated and filtered by name"""
+    search = request.args.get('q', '').strip()
+    
+    query = scoped(Team)
+    if search:
+        query = query.filter(Team.name.ilike(f'%{search}%'))
+    
+    total = query.count()
+    teams, next_cursor, prev_cursor = keyset_page(query, Team.id)
+    
+    # Player counts for the whole page from one grouped query
+    player_counts = dict(
+        db.session.query(Player.team_id, func.count(Player.id))
+        .filter(Player.team_id.in_([team.id for team in teams]))
+        .group_by(Player.team_id)
+        .all()
+    ) if teams else {}
+    
+    return render_template('admin/teams.html',
+                         teams=teams,
+                         total=total,
+                         player_counts=player_counts,
+                         search=search,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor)
 
 @app.route('/admin/teams/add', methods=['POST'])
 @admin_required
@@ -503,16 +712,19 @@ def add_team():
     """Add a new team"""
     name = request.form.get('name')
     if name:
-        team = Team(name=name)
-        db.session.add(team)
-        db.session.commit()
+        if scoped(Team).filter_by(name=name).first():
+            flash(f"Team '{name}' already exists.", 'error')
+        else:
+            db.session.add(Team(tournament_id=current_tournament_id(), name=name))
+            db.session.commit()
     return redirect(url_for('admin_teams'))
 
 @app.route('/admin/teams/delete/<int:team_id>', methods=['POST'])
 @admin_required
 def delete_team(team_id):
     """Delete a team"""
-    team = Team.query.get_or_404(team_id)
+    team = scoped_or_404(Team, team_id)
+    affected = events_players(*(player.id for player in team.players))
     
     # Delete associated seeding record if it exists
     seeding = TeamSeeding.query.filter_by(team_id=team_id).first()
@@ -521,7 +733,12 @@ def delete_team(team_id):
     
     # Delete the team (will cascade to players due to model relationship)
     db.session.delete(team)
+    db.session.flush()
+    rebuild_player_stats(affected)
     db.session.commit()
+    invalidate_box_scores()
+    invalidate_rosters(team_id)
+    LIVE.clear()
     return redirect(url_for('admin_teams'))
 
 # --- PLAYER MANAGEMENT ---
@@ -529,10 +746,42 @@ def delete_team(team_id):
 @app.route('/admin/players')
 @admin_required
 def admin_players():
-    """View all players"""
-    players = Player.query.all()
-    teams = Team.query.all()
-    return render_template('admin/players.html', players=players, teams=teams)
+    """View players, paginated and filtered by name, team and jersey"""
+    search = request.args.get('q', '').strip()
+    team_filter = request.args.get('team', type=int)
+    jersey = request.args.get('jersey', '').strip()
+    
+    # Team names come from the same query as the players
+    query = scoped(Player).options(joinedload(Player.team))
+    if search:
+        query = query.filter(Player.name.ilike(f'%{search}%'))
+    if team_filter:
+        query = query.filter(Player.team_id == team_filter)
+    if jersey:
+        query = query.filter(Player.jersey_number == jersey)
+    
+    total = query.count()
+    players, next_cursor, prev_cursor = keyset_page(query, Player.id)
+    
+    # Point totals for the whole page from one grouped query
+    player_points = dict(
+        db.session.query(Score.player_id, func.sum(Score.points))
+        .filter(Score.player_id.in_([player.id for player in players]))
+        .group_by(Score.player_id)
+        .all()
+    ) if players else {}
+    
+    teams = scoped(Team).order_by(Team.name).all()
+    return render_template('admin/players.html',
+                         players=players,
+                         teams=teams,
+                         total=total,
+                         player_points=player_points,
+                         search=search,
+                         team_filter=team_filter,
+                         jersey=jersey,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor)
 
 @app.route('/admin/players/add', methods=['POST'])
 @admin_required
@@ -542,19 +791,30 @@ def add_player():
     team_id = request.form.get('team_id')
     jersey_number = request.form.get('jersey_number')
     
-    if name and team_id:
-        player = Player(name=name, team_id=team_id, jersey_number=jersey_number)
+    team = scoped(Team).filter(Team.id == team_id).first() if team_id else None
+    if name and team:
+        player = Player(tournament_id=team.tournament_id, name=name, team_id=team.id, jersey_number=jersey_number)
         db.session.add(player)
         db.session.commit()
+        invalidate_box_scores()
+        invalidate_rosters(team.id)
+        LIVE.clear()
     return redirect(url_for('admin_players'))
 
 @app.route('/admin/players/delete/<int:player_id>', methods=['POST'])
 @admin_required
 def delete_player(player_id):
     """Delete a player"""
-    player = Player.query.get_or_404(player_id)
+    player = scoped_or_404(Player, player_id)
+    team_id = player.team_id
+    affected = events_players(player_id)
     db.session.delete(player)
+    db.session.flush()
+    rebuild_player_stats(affected)
     db.session.commit()
+    invalidate_box_scores()
+    invalidate_rosters(team_id)
+    LIVE.clear()
     return redirect(url_for('admin_players'))
 
 @app.route('/admin/upload-excel', methods=['GET', 'POST'])
@@ -589,7 +849,7 @@ def upload_excel():
                 teams_sheet = wb['Teams'] if 'Teams' in wb.sheetnames else wb['teams']
                 
                 # Get existing team names to avoid duplicates
-                existing_teams = {team.name.lower(): team for team in Team.query.all()}
+                existing_teams = {team.name.lower(): team for team in scoped(Team).all()}
                 team_name_to_id = {}
                 
                 # Start from row 2 to skip header
@@ -609,7 +869,7 @@ def upload_excel():
                         errors.append(f"Team '{team_name}' already exists - skipped")
                     else:
                         # Create new team
-                        team = Team(name=team_name)
+                        team = Team(tournament_id=current_tournament_id(), name=team_name)
                         db.session.add(team)
                         db.session.flush()  # Get the ID
                         team_name_to_id[team_name] = team.id
@@ -625,8 +885,8 @@ def upload_excel():
                 players_sheet = wb['Players'] if 'Players' in wb.sheetnames else wb['players']
                 
                 # Reload teams after commit
-                existing_teams = {team.name.lower(): team for team in Team.query.all()}
-                team_name_to_id = {team.name: team.id for team in Team.query.all()}
+                existing_teams = {team.name.lower(): team for team in scoped(Team).all()}
+                team_name_to_id = {team.name: team.id for team in existing_teams.values()}
                 
                 # Start from row 2 to skip header
                 for row_num, row in enumerate(players_sheet.iter_rows(min_row=2, values_only=True), start=2):
@@ -654,6 +914,7 @@ def upload_excel():
                     
                     # Create player
                     player = Player(
+                        tournament_id=team.tournament_id,
                         name=player_name,
                         team_id=team.id,
                         jersey_number=jersey_number
@@ -662,6 +923,9 @@ def upload_excel():
                     players_added += 1
                 
                 db.session.commit()
+                invalidate_box_scores()
+                invalidate_rosters()
+                LIVE.clear()
             else:
                 errors.append("No 'Players' sheet found in Excel file")
             
@@ -681,12 +945,64 @@ def upload_excel():
             return redirect(request.url)
     
     # GET request - show upload form
-    teams_count = Team.query.count()
-    players_count = Player.query.count()
+    teams_count = scoped(Team).count()
+    players_count = scoped(Player).count()
     return render_template('admin/upload_excel.html', 
                          teams_count=teams_count,
                          players_count=players_count)
 
+@app.route('/admin/export/<dataset>.<fmt>')
+@admin_required
+def export_dataset(dataset, fmt):
+    """
+    Download matches, scores or spirit_scores as CSV (streamed in chunks) or
+    Parquet. ?since= exports only scores after that id, or spirit scores
+    created at or after that timestamp.
+    """
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        flash('Unknown export.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    
+    since = request.args.get('since')
+    if since and dataset == 'scores':
+        since = (request.args.get('since', type=int) or 0,)
+    elif since and dataset == 'spirit_scores':
+        since = (since, 0)
+    else:
+        since = None
+    
+    conn = sqlite3.connect(f'file:{db.engine.url.database}?mode=ro', uri=True, timeout=30)
+    filename = f'{dataset}.{fmt}'
+    
+    if fmt == 'csv':
+        def generate():
+            try:
+                yield from csv_stream(conn, dataset, since)
+            finally:
+                conn.close()
+        return Response(generate(), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    
+    # Parquet needs a seekable file, so it is written chunk by chunk to a temp file
+    tmp = tempfile.NamedTemporaryFile(suffix='.parquet', delete=False)
+    tmp.close()
+    try:
+        count, _ = write_parquet(conn, dataset, tmp.name, since)
+    except ExportError as e:
+        os.remove(tmp.name)
+        flash(str(e), 'error')
+        return redirect(url_for('admin_dashboard'))
+    finally:
+        conn.close()
+    if not count:
+        os.remove(tmp.name)
+        flash('Nothing to export.', 'warning')
+        return redirect(url_for('admin_dashboard'))
+    
+    response = send_file(tmp.name, as_attachment=True, download_name=filename)
+    response.call_on_close(lambda: os.remove(tmp.name))
+    return response
+
 
 # --- MATCH MANAGEMENT ---
 
@@ -694,8 +1010,8 @@ def upload_excel():
 @admin_required
 def admin_matches():
     """View all matches"""
-    matches = Match.query.order_by(Match.match_date.desc()).all()
-    teams = Team.query.all()
+    matches = scoped(Match).order_by(Match.match_date.desc()).all()
+    teams = scoped(Team).all()
     return render_template('admin/matches.html', matches=matches, teams=teams)
 
 @app.route('/admin/matches/add', methods=['POST'])
@@ -710,8 +1026,15 @@ def add_match():
     max_score = request.form.get('max_score', '15')
     match_stage = request.form.get('match_stage', 'Pool Stage')
     
+    # Both teams must belong to the current tournament
+    team_ids = {team1_id, team2_id}
+    if team1_id and team2_id and scoped(Team).filter(Team.id.in_(team_ids)).count() != len(team_ids):
+        flash('Both teams must belong to the current tournament.', 'error')
+        return redirect(url_for('admin_matches'))
+    
     if team1_id and team2_id and match_date:
         match = Match(
+            tournament_id=current_tournament_id(),
             team1_id=team1_id,
             team2_id=team2_id,
             match_date=datetime.fromisoformat(match_date),
@@ -729,20 +1052,61 @@ def add_match():
 @admin_required
 def update_match_status(match_id):
     """Update match status"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
     status = request.form.get('status')
     if status:
         match.status = status
         db.session.commit()
+        LIVE.sync(match)
+        if status == 'completed':
+            advance_schedule(match.tournament_id)
+    return redirect(url_for('admin_matches'))
+
+@app.route('/admin/schedule/generate', methods=['POST'])
+@admin_required
+def generate_schedule_route():
+    """Generate pools, cross-pool and placement games from the seedings"""
+    try:
+        num_pools = int(request.form.get('num_pools', 2))
+        num_fields = int(request.form.get('num_fields', 1))
+        start_time = datetime.fromisoformat(request.form.get('start_time', ''))
+        duration_minutes = int(request.form.get('duration_minutes', 60))
+        break_minutes = int(request.form.get('break_minutes', 0) or 0)
+        max_score = int(request.form.get('max_score', 15))
+    except ValueError:
+        flash('Please fill in every schedule setting with a valid value.', 'error')
+        return redirect(url_for('admin_matches'))
+    
+    if scoped(ScheduleSlot).count() and not request.form.get('replace'):
+        flash('A schedule already exists. Tick "Replace existing schedule" to regenerate it.', 'error')
+        return redirect(url_for('admin_matches'))
+    
+    try:
+        slot_count = generate_schedule(current_tournament_id(), num_pools, num_fields, start_time,
+                                       duration_minutes=duration_minutes,
+                                       break_minutes=break_minutes,
+                                       max_score=max_score)
+    except ScheduleError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+        return redirect(url_for('admin_matches'))
+    
+    flash(f'Schedule generated with {slot_count} games. Later rounds fill in as results come in.', 'success')
     return redirect(url_for('admin_matches'))
 
 @app.route('/admin/matches/delete/<int:match_id>', methods=['POST'])
 @admin_required
 def delete_match(match_id):
     """Delete a match"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
+    affected = events_players(match_id=match_id)
+    # A generated slot keeps its place in the schedule without the match
+    ScheduleSlot.query.filter_by(match_id=match_id).update({'match_id': None})
     db.session.delete(match)
+    db.session.flush()
+    rebuild_player_stats(affected)
     db.session.commit()
+    LIVE.discard(match_id)
     return redirect(url_for('admin_matches'))
 
 # --- LIVE SCORING ---
@@ -751,49 +1115,54 @@ def delete_match(match_id):
 @admin_required
 def admin_scoring(match_id):
     """Live scoring interface for a match"""
-    match = Match.query.get_or_404(match_id)
-    team1_players = Player.query.filter_by(team_id=match.team1_id).all()
-    team2_players = Player.query.filter_by(team_id=match.team2_id).all()
-    scores = Score.query.filter_by(match_id=match_id).order_by(Score.timestamp.desc()).all()
-    
-    # Convert players to dictionaries for JSON serialization
-    team1_players_dict = [p.to_dict() for p in team1_players]
-    team2_players_dict = [p.to_dict() for p in team2_players]
+    match = scoped_or_404(Match, match_id)
+    scores = match_events(match_id)
     
     return render_template('admin/live_scoring.html', 
                          match=match,
-                         team1_players=team1_players,
-                         team2_players=team2_players,
-                         team1_players_dict=team1_players_dict,
-                         team2_players_dict=team2_players_dict,
+                         clock=clock_state(match),
+                         team1_players=get_roster(match.team1_id),
+                         team2_players=get_roster(match.team2_id),
+                         player_stats=player_stats(get_box_score(match)),
                          scores=scores)
 
 @app.route('/admin/scoring/<int:match_id>/add', methods=['POST'])
 @admin_required
 def add_action(match_id):
-    """Add a score or defense action to a match"""
-    match = Match.query.get_or_404(match_id)
+    """Add a score, callahan, block, turnover or drop to a match"""
+    match = scoped_or_404(Match, match_id)
     player_id = request.form.get('player_id')
-    action_type = request.form.get('action_type')  # 'score' or 'defense'
+    action_code = ACTION_CODES.get(request.form.get('action_type'))
     
-    if player_id and action_type:
-        if action_type == 'score':
-            points = int(request.form.get('points', 1))
-            assist_player_id = request.form.get('assist_player_id') or None
-            
-            # Create score record
-            score = Score(
-                match_id=match_id,
-                player_id=player_id,
-                action_type='score',
-                points=points,
-                assist_player_id=assist_player_id,
-                timestamp=datetime.now()
-            )
-            db.session.add(score)
-            
+    if player_id and request.form.get('action_type') and action_code is None:
+        flash('Unknown action type.', 'error')
+        return redirect(url_for('admin_scoring', match_id=match_id))
+    
+    player = scoped(Player).filter(Player.id == player_id).first() if player_id else None
+    if player_id and (player is None or player.team_id not in (match.team1_id, match.team2_id)):
+        flash('That player is not on either team in this match.', 'error')
+        return redirect(url_for('admin_scoring', match_id=match_id))
+    
+    if player_id and action_code:
+        is_goal = action_code in GOAL_ACTIONS
+        points = int(request.form.get('points', 1)) if is_goal else 0
+        # Only a thrown goal has an assist
+        assist_player_id = (request.form.get('assist_player_id') or None) if action_code == ACTION_SCORE else None
+        
+        # Create event record
+        score = Score(
+            match_id=match_id,
+            player_id=player_id,
+            action_type=action_code,
+            points=points,
+            assist_player_id=assist_player_id,
+            timestamp=datetime.now()
+        )
+        db.session.add(score)
+        record_event(score)
+        
+        if is_goal:
             # Update match score
-            player = Player.query.get(player_id)
             if player.team_id == match.team1_id:
                 match.team1_score += points
             else:
@@ -808,37 +1177,51 @@ def add_action(match_id):
             # Increment total points played for ratio tracking
             match.total_points_played += 1
             
-            # Check if match has reached max score
-            if match.team1_score >= match.max_score or match.team2_score >= match.max_score:
+            # Check if match has reached its (possibly capped) target, or the hard cap point is over
+            if match_over(match):
                 match.status = 'completed'
                 flash('Match completed!', 'success')
+        elif action_code == ACTION_BLOCK:
+            # Blocking team takes possession
+            set_offense(match, player.team_id)
+        else:
+            # Turnover or drop: the other team takes possession
+            set_offense(match, match.team2_id if player.team_id == match.team1_id else match.team1_id)
         
+        match.version = (match.version or 0) + 1
         db.session.commit()
+        LIVE.sync(match, added=score)
+        if match.status == 'completed':
+            advance_schedule(match.tournament_id)
     
     return redirect(url_for('admin_scoring', match_id=match_id))
 
+def set_offense(match, offense_team_id):
+    """Put offense_team_id on offense and the other team on defense"""
+    match.current_offense_team_id = offense_team_id
+    match.current_defense_team_id = match.team2_id if offense_team_id == match.team1_id else match.team1_id
+
 @app.route('/admin/scoring/<int:match_id>/undo/<int:score_id>', methods=['POST'])
 @admin_required
 def undo_action(match_id, score_id):
-    """Undo a score or defense action"""
-    match = Match.query.get_or_404(match_id)
-    score = Score.query.get_or_404(score_id)
+    """Undo a scoring event"""
+    match = scoped_or_404(Match, match_id)
+    # The event must belong to this match, or another match's totals would be undone here
+    score = Score.query.filter_by(id=score_id, match_id=match_id).first_or_404()
     
-    # Update match score only for actual scoring actions (not defense)
-    if score.action_type == 'score':
+    # Update match score only for goals (scores and callahans)
+    if score.is_goal:
         player = Player.query.get(score.player_id)
         if player.team_id == match.team1_id:
             match.team1_score -= score.points
         else:
             match.team2_score -= score.points
     
+    record_event(score, sign=-1)
+    match.version = (match.version or 0) + 1
     db.session.delete(score)
     db.session.commit()
-    
-    return redirect(url_for('admin_scoring', match_id=match_id))
-    
-    db.session.delete(score)
-    db.session.commit()
+    LIVE.sync(match, removed_id=score_id)
     
     return redirect(url_for('admin_scoring', match_id=match_id))
 
@@ -846,7 +1229,7 @@ def undo_action(match_id, score_id):
 @admin_required
 def start_match(match_id):
     """Start a match and set initial offense/defense and gender ratio"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
     offense_team_id = request.form.get('offense_team_id')
     gender_ratio = request.form.get('gender_ratio')
     
@@ -856,12 +1239,15 @@ def start_match(match_id):
         match.current_offense_team_id = int(offense_team_id)
         match.gender_ratio = gender_ratio
         match.total_points_played = 0
+        match.cap_state = None
+        match.cap_target = None
         # Defense is the other team
         if int(offense_team_id) == match.team1_id:
             match.current_defense_team_id = match.team2_id
         else:
             match.current_defense_team_id = match.team1_id
         db.session.commit()
+        LIVE.sync(match)
         flash(f'Match started!', 'success')
     
     return redirect(url_for('admin_scoring', match_id=match_id))
@@ -870,16 +1256,13 @@ def start_match(match_id):
 @admin_required
 def set_possession(match_id):
     """Set or switch offense/defense during a match"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
     offense_team_id = request.form.get('offense_team_id')
     
     if offense_team_id:
-        match.current_offense_team_id = int(offense_team_id)
-        if int(offense_team_id) == match.team1_id:
-            match.current_defense_team_id = match.team2_id
-        else:
-            match.current_defense_team_id = match.team1_id
+        set_offense(match, int(offense_team_id))
         db.session.commit()
+        LIVE.sync(match)
         flash('Possession updated!', 'success')
     
     return redirect(url_for('admin_scoring', match_id=match_id))
@@ -888,12 +1271,13 @@ def set_possession(match_id):
 @admin_required
 def set_ratio(match_id):
     """Update gender ratio during a match"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
     gender_ratio = request.form.get('gender_ratio')
     
     if gender_ratio:
         match.gender_ratio = gender_ratio
         db.session.commit()
+        LIVE.sync(match)
         flash('Ratio updated!', 'success')
     
     return redirect(url_for('admin_scoring', match_id=match_id))
@@ -902,11 +1286,16 @@ def set_ratio(match_id):
 @admin_required
 def end_match(match_id):
     """End a match manually"""
-    match = Match.query.get_or_404(match_id)
+    match = scoped_or_404(Match, match_id)
     match.status = 'completed'
     db.session.commit()
+    LIVE.sync(match)
+    advance_schedule(match.tournament_id)
     flash('Match ended!', 'success')
     return redirect(url_for('admin_scoring', match_id=match_id))
 
 if __name__ == '__main__':
+    # debug=True serves from the reloader's child process; run the match clock only there
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_clock(app, on_change=LIVE.discard)
     app.run(debug=True, host='0.0.0.0', port=5011)
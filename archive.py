@@ -0,0 +1,190 @@
+"""
+Frozen snapshots of finished tournaments.
+
+Once a tournament is over its standings, leaderboards and match pages never
+change, so archiving renders each public page and API response once and
+writes it under instance/archives/<tournament_id>/ (one file per page).
+While a tournament is archived those views are served straight from the
+files, without querying the live tables; admin edits to it are refused
+until it is unarchived, which deletes the snapshot. Match pages and their
+APIs are served from the archive of the tournament that owns the match,
+whichever tournament the visitor has selected. Snapshots are rendered
+without the nav's tournament switcher, which would go stale as new
+tournaments are added.
+
+Usage:
+    python archive.py 3            # archive tournament 3
+    python archive.py 3 --remove   # unarchive it
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+
+from flask import Response
+from werkzeug.datastructures import MultiDict
+
+from models import db, Tournament, Team, Match
+
+ARCHIVE_DIR = 'instance/archives'
+
+# Archived pages may be cached by browsers and proxies for this long (seconds)
+ARCHIVE_MAX_AGE = 3600
+
+MIMETYPES = {'.html': 'text/html', '.json': 'application/json'}
+
+# WSGI environ key set on the requests that render a snapshot
+SNAPSHOT_ENVIRON = 'frisbee.archive_snapshot'
+
+MATCH_PATH = re.compile(r'/match/(\d+)|/api/match/(\d+)/[a-z]+')
+
+
+class ArchiveError(Exception):
+    """Raised when a tournament cannot be archived"""
+
+
+def archive_dir(tournament_id, root=ARCHIVE_DIR):
+    return os.path.join(root, str(tournament_id))
+
+
+def snapshot_path(path, args):
+    """Snapshot file (relative to the tournament's archive) for a public URL, or None"""
+    if path == '/':
+        return 'index.html'
+    if path == '/standings':
+        return 'standings.html'
+    if path == '/leaderboard':
+        team_id = args.get('team', type=int)
+        return f'leaderboard/team-{team_id}.html' if team_id else 'leaderboard.html'
+    if path in ('/api/standings', '/api/standings/spirit'):
+        return f'{path[1:]}.json'
+    match = re.fullmatch(r'/match/(\d+)', path)
+    if match:
+        return f'match/{match.group(1)}.html'
+    match = re.fullmatch(r'/api/match/(\d+)/(scores|boxscore|ratio)', path)
+    if match:
+        match_id, view = match.groups()
+        # The compact payload always carries rosters, so any roster key gets this copy
+        if view == 'scores' and args.get('v', type=int) == 2:
+            view = 'scores.v2'
+        return f'api/match/{match_id}/{view}.json'
+    return None
+
+
+def snapshot_match_id(path):
+    """The match id of a match page or match API path, else None"""
+    found = MATCH_PATH.fullmatch(path)
+    return int(found.group(1) or found.group(2)) if found else None
+
+
+def snapshot_urls(tournament_id):
+    """(path, query) of every public view of a tournament"""
+    urls = [('/', {}), ('/standings', {}), ('/leaderboard', {}),
+            ('/api/standings', {}), ('/api/standings/spirit', {})]
+    for (team_id,) in db.session.query(Team.id).filter(Team.tournament_id == tournament_id):
+        urls.append(('/leaderboard', {'team': team_id}))
+    for (match_id,) in db.session.query(Match.id).filter(Match.tournament_id == tournament_id):
+        urls += [(f'/match/{match_id}', {}),
+                 (f'/api/match/{match_id}/scores', {}),
+                 (f'/api/match/{match_id}/scores', {'v': 2}),
+                 (f'/api/match/{match_id}/boxscore', {}),
+                 (f'/api/match/{match_id}/ratio', {})]
+    return urls
+
+
+def archive_tournament(app, tournament_id, root=ARCHIVE_DIR):
+    """
+    Render every public view of a completed tournament to files and mark it
+    archived. Needs an app context. Returns the number of files written.
+    """
+    tournament = db.session.get(Tournament, tournament_id)
+    if tournament is None:
+        raise ArchiveError(f"Tournament {tournament_id} not found")
+    if tournament.status != 'completed':
+        raise ArchiveError(f"Only completed tournaments can be archived ('{tournament.name}' is {tournament.status})")
+
+    # Render into a temporary directory and swap it in, so a failed run leaves no partial archive
+    target = archive_dir(tournament_id, root)
+    staging = f'{target}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+
+    urls = snapshot_urls(tournament_id)
+    # Hand the writer connection back to the pool; each render needs one for its own lookups
+    db.session.commit()
+
+    client = app.test_client()
+    count = 0
+    for path, query in urls:
+        # A fresh app context keeps each render's g and session apart from the caller's
+        with app.app_context():
+            response = client.get(path, query_string={'tournament': tournament_id, **query},
+                                  environ_overrides={SNAPSHOT_ENVIRON: True})
+        if response.status_code != 200:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ArchiveError(f"{path} returned {response.status_code}")
+        relative = snapshot_path(path, MultiDict(query))
+        file_path = os.path.join(staging, relative)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(response.get_data())
+        count += 1
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+
+    tournament.status = 'archived'
+    db.session.commit()
+    return count
+
+
+def remove_archive(tournament_id, root=ARCHIVE_DIR):
+    """Delete a tournament's snapshot files"""
+    shutil.rmtree(archive_dir(tournament_id, root), ignore_errors=True)
+
+
+def archived_response(tournament_id, path, args, root=ARCHIVE_DIR):
+    """The archived copy of a public view as a Response, or None if there is none"""
+    relative = snapshot_path(path, args)
+    if relative is None:
+        return None
+    file_path = os.path.join(archive_dir(tournament_id, root), relative)
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        response = Response(f.read(), mimetype=MIMETYPES[os.path.splitext(relative)[1]])
+    response.headers['Cache-Control'] = f'public, max-age={ARCHIVE_MAX_AGE}'
+    return response
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Archive a completed tournament into static snapshots')
+    parser.add_argument('tournament_id', type=int)
+    parser.add_argument('--remove', action='store_true', help='delete the snapshot and unarchive')
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    with app.app_context():
+        tournament = db.session.get(Tournament, args.tournament_id)
+        if tournament is None:
+            print(f"✗ Tournament {args.tournament_id} not found")
+            return 1
+        if args.remove:
+            remove_archive(tournament.id)
+            if tournament.status == 'archived':
+                tournament.status = 'completed'
+                db.session.commit()
+            print(f"✓ Unarchived {tournament.name}")
+            return 0
+        try:
+            count = archive_tournament(app, tournament.id)
+        except ArchiveError as e:
+            print(f"✗ {e}")
+            return 1
+        print(f"✓ Archived {tournament.name}: {count} page(s) in {archive_dir(tournament.id)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Static asset pipeline.
+
+`python assets.py` builds static/dist/:
+  - style.css, main.js, poller.js and clock.js minified, with a content hash in the
+    file name
+  - every image in static/images resized to a few widths, as JPEG and WebP,
+    also content-hashed (the build needs Pillow, from requirements.txt)
+  - manifest.json mapping each source file to its built files
+
+Templates use asset_url() and responsive_image(), which read the manifest
+and fall back to the unbuilt files when there is no build. Hashed files
+never change, so they are served with an immutable, year-long Cache-Control.
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image
+except ImportError:  # Only the build needs Pillow; the app just reads the manifest
+    Image = None
+
+STATIC_DIR = 'static'
+DIST_DIR = 'dist'   # under STATIC_DIR
+MANIFEST_NAME = 'manifest.json'
+
+TEXT_ASSETS = ('css/style.css', 'js/main.js', 'js/poller.js', 'js/clock.js')
+IMAGE_DIR = 'images'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+IMAGE_WIDTHS = (480, 960, 1600)
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+class AssetBuildError(Exception):
+    """Raised when the asset build cannot run"""
+
+
+# ============ BUILD ============
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """Conservative minify: drop indentation, blank lines and whole-line comments"""
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def hashed_name(path, data, suffix=''):
+    """'css/style.css' -> 'css/style.<hash>.css'"""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}{suffix}.{content_hash(data)}{ext}'
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _write(dist, relative, data):
+    path = os.path.join(dist, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_images(static_dir, dist):
+    """Resize and re-encode every image. Returns manifest entries by source path."""
+    entries = {}
+    source_dir = os.path.join(static_dir, IMAGE_DIR)
+    if not os.path.isdir(source_dir):
+        return entries
+
+    for name in sorted(os.listdir(source_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        source = f'{IMAGE_DIR}/{name}'
+        base = f'{IMAGE_DIR}/{slugify(os.path.splitext(name)[0])}'
+
+        with Image.open(os.path.join(static_dir, source)) as img:
+            img = img.convert('RGB')
+            widths = sorted({w for w in IMAGE_WIDTHS if w < img.width} | {min(img.width, IMAGE_WIDTHS[-1])})
+            entry = {'width': img.width, 'height': img.height, 'jpeg': [], 'webp': []}
+            for width in widths:
+                height = round(img.height * width / img.width)
+                resized = img.resize((width, height), Image.LANCZOS) if width != img.width else img
+                for fmt, ext, options in (('jpeg', '.jpg', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+                                          ('webp', '.webp', {'quality': WEBP_QUALITY, 'method': 6})):
+                    buffer = io.BytesIO()
+                    resized.save(buffer, fmt.upper(), **options)
+                    data = buffer.getvalue()
+                    built = hashed_name(f'{base}-{width}{ext}', data)
+                    _write(dist, built, data)
+                    entry[fmt].append([width, built])
+            entry['src'] = entry['jpeg'][-1][1]
+            entries[source] = entry
+    return entries
+
+
+def build(static_dir=STATIC_DIR):
+    """Rebuild static/dist and its manifest. Returns the manifest."""
+    if Image is None:
+        raise AssetBuildError("The asset build needs Pillow (pip install -r requirements.txt)")
+    dist = os.path.join(static_dir, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+
+    manifest = {'files': {}, 'images': {}}
+    for source in TEXT_ASSETS:
+        with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+            text = f.read()
+        minify = minify_css if source.endswith('.css') else minify_js
+        data = minify(text).encode('utf-8')
+        built = hashed_name(source, data)
+        _write(dist, built, data)
+        manifest['files'][source] = built
+
+    manifest['images'] = build_images(static_dir, dist)
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ============ RUNTIME ============
+
+_manifest = {'mtime': None, 'data': {'files': {}, 'images': {}}}
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """The build manifest, re-read only when the file changes"""
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {'files': {}, 'images': {}}
+    if mtime != _manifest['mtime']:
+        with open(path, encoding='utf-8') as f:
+            _manifest['data'] = json.load(f)
+        _manifest['mtime'] = mtime
+    return _manifest['data']
+
+
+def _static_url(built):
+    return url_for('static', filename=f'{DIST_DIR}/{built}')
+
+
+def asset_url(filename):
+    """URL of the built, hashed copy of a static file, or of the file itself"""
+    manifest = load_manifest()
+    built = manifest['files'].get(filename) or manifest['images'].get(filename, {}).get('src')
+    return _static_url(built) if built else url_for('static', filename=filename)
+
+
+def responsive_image(filename, alt='', sizes='100vw', **attrs):
+    """<picture> with WebP and JPEG srcsets for a built image, else a plain <img>"""
+    entry = load_manifest()['images'].get(filename)
+    attrs.setdefault('loading', 'lazy')
+    extra = ''.join(f' {escape(k)}="{escape(v)}"' for k, v in attrs.items())
+    if not entry or not entry['jpeg']:
+        return Markup(f'<img src="{escape(asset_url(filename))}" alt="{escape(alt)}"{extra}>')
+
+    def srcset(fmt):
+        return ', '.join(f'{_static_url(path)} {width}w' for width, path in entry[fmt])
+
+    return Markup(
+        f'<picture>'
+        f'<source type="image/webp" srcset="{escape(srcset("webp"))}" sizes="{escape(sizes)}">'
+        f'<img src="{escape(_static_url(entry["src"]))}" srcset="{escape(srcset("jpeg"))}" '
+        f'sizes="{escape(sizes)}" width="{entry["width"]}" height="{entry["height"]}" '
+        f'alt="{escape(alt)}" decoding="async"{extra}>'
+        f'</picture>'
+    )
+
+
+def cache_headers(response, path):
+    """Long-lived immutable caching for hashed build output"""
+    if path.startswith(f'/{STATIC_DIR}/{DIST_DIR}/') and response.status_code == 200:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response
+
+
+if __name__ == '__main__':
+    try:
+        manifest = build()
+    except AssetBuildError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"✓ Built {len(manifest['files'])} CSS/JS file(s) and {len(manifest['images'])} image(s) into "
+          f"{os.path.join(STATIC_DIR, DIST_DIR)}")
@@ -0,0 +1,211 @@
+"""
+Hot backups and point-in-time snapshots of the SQLite database.
+
+Backups use SQLite's online backup API, copying a limited number of pages
+per step and pausing between steps so scorekeepers can keep writing while
+a snapshot is taken. Every backup is checked with PRAGMA integrity_check
+before it is kept.
+
+Usage:
+    python backup.py backup [--dest FILE]     # take a snapshot now
+    python backup.py list                     # list snapshots
+    python backup.py restore FILE             # restore a snapshot
+    python backup.py schedule [--interval 15] [--keep 48]
+                                              # snapshot periodically on match days
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from migrations import DB_PATH
+
+BACKUP_DIR = 'instance/backups'
+SNAPSHOT_PREFIX = 'frisbee_'
+
+# Pages copied per backup step, and pause between steps (seconds)
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.01
+
+# Scheduled snapshot defaults
+SCHEDULE_INTERVAL_MINUTES = 15
+SNAPSHOT_RETENTION = 48
+
+
+class BackupError(Exception):
+    """Raised when a backup or restore cannot be completed safely"""
+
+
+def check_integrity(db_path):
+    """Return True if PRAGMA integrity_check passes for the database file"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        result = conn.execute('PRAGMA integrity_check').fetchone()
+    finally:
+        conn.close()
+    return result is not None and result[0] == 'ok'
+
+
+def _copy(source_path, dest_path, pages, sleep):
+    source = sqlite3.connect(source_path, timeout=30)
+    dest = sqlite3.connect(dest_path, timeout=30)
+    try:
+        source.backup(dest, pages=pages, sleep=sleep)
+    finally:
+        dest.close()
+        source.close()
+
+
+def snapshot_path(when=None):
+    when = when or datetime.now()
+    base = os.path.join(BACKUP_DIR, f'{SNAPSHOT_PREFIX}{when.strftime("%Y%m%d_%H%M%S")}')
+    path, n = f'{base}.db', 1
+    while os.path.exists(path):
+        path, n = f'{base}_{n}.db', n + 1
+    return path
+
+
+def backup_database(db_path=DB_PATH, dest_path=None, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+    """
+    Take an online backup of db_path and verify it.
+    Returns the backup path, or None if there is no database yet.
+    """
+    if not os.path.exists(db_path):
+        return None
+
+    dest_path = dest_path or snapshot_path()
+    os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+    if os.path.exists(dest_path):
+        raise BackupError(f"Backup file already exists: {dest_path}")
+
+    _copy(db_path, dest_path, pages, sleep)
+
+    if not check_integrity(dest_path):
+        os.remove(dest_path)
+        raise BackupError(f"Integrity check failed for backup of {db_path}")
+
+    return dest_path
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    """Return snapshot paths, oldest first"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(backup_dir)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith('.db')
+    )
+    return [os.path.join(backup_dir, name) for name in names]
+
+
+def prune_snapshots(keep=SNAPSHOT_RETENTION, backup_dir=BACKUP_DIR):
+    """Delete all but the newest `keep` snapshots. Returns removed paths."""
+    snapshots = list_snapshots(backup_dir)
+    removed = snapshots[:-keep] if keep > 0 else snapshots
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def restore_database(backup_path, db_path=DB_PATH):
+    """
+    Restore a snapshot over the live database using the backup API.
+
+    The snapshot is verified first and the current database is saved as a
+    fresh snapshot, so a restore can itself be undone.
+    """
+    if not os.path.exists(backup_path):
+        raise BackupError(f"Backup not found: {backup_path}")
+    if not check_integrity(backup_path):
+        raise BackupError(f"Integrity check failed for {backup_path} - not restoring")
+
+    safety_path = backup_database(db_path)
+
+    # Copy in a single step so readers never see a half-restored database
+    _copy(backup_path, db_path, pages=-1, sleep=0)
+
+    if not check_integrity(db_path):
+        raise BackupError(f"Restored database failed integrity check; previous copy is at {safety_path}")
+
+    return safety_path
+
+
+def is_match_day(db_path=DB_PATH):
+    """True if any match is live or scheduled for today"""
+    if not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        row = conn.execute("""
+            SELECT 1 FROM "match"
+            WHERE status = 'live' OR date(match_date) = date('now', 'localtime')
+            LIMIT 1
+        """).fetchone()
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+    return row is not None
+
+
+def run_schedule(interval_minutes=SCHEDULE_INTERVAL_MINUTES, keep=SNAPSHOT_RETENTION, db_path=DB_PATH):
+    """Take a snapshot every interval on match days, keeping the newest `keep`"""
+    print(f"Snapshot scheduler running every {interval_minutes} min (keeping {keep}). Ctrl+C to stop.")
+    while True:
+        if is_match_day(db_path):
+            try:
+                path = backup_database(db_path)
+                removed = prune_snapshots(keep)
+                print(f"✓ {datetime.now():%H:%M:%S} snapshot {path} ({len(removed)} pruned)")
+            except (BackupError, sqlite3.Error) as e:
+                print(f"✗ {datetime.now():%H:%M:%S} snapshot failed: {e}")
+        time.sleep(interval_minutes * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hot backup and restore for the frisbee database')
+    parser.add_argument('--db', default=DB_PATH, help='database path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    backup_cmd = commands.add_parser('backup', help='take a snapshot now')
+    backup_cmd.add_argument('--dest', help='backup file (default: timestamped file in instance/backups)')
+
+    commands.add_parser('list', help='list snapshots')
+
+    restore_cmd = commands.add_parser('restore', help='restore a snapshot over the live database')
+    restore_cmd.add_argument('backup_file')
+
+    schedule_cmd = commands.add_parser('schedule', help='take periodic snapshots on match days')
+    schedule_cmd.add_argument('--interval', type=int, default=SCHEDULE_INTERVAL_MINUTES, help='minutes between snapshots')
+    schedule_cmd.add_argument('--keep', type=int, default=SNAPSHOT_RETENTION, help='number of snapshots to retain')
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'backup':
+            path = backup_database(args.db, args.dest)
+            if path:
+                print(f"✓ Database backed up to: {path}")
+            else:
+                print(f"Database not found: {args.db}")
+        elif args.command == 'list':
+            for path in list_snapshots():
+                print(f"{path}  ({os.path.getsize(path) // 1024} KB)")
+        elif args.command == 'restore':
+            safety_path = restore_database(args.backup_file, args.db)
+            print(f"✓ Restored {args.backup_file}")
+            print(f"  Previous database saved to: {safety_path}")
+        elif args.command == 'schedule':
+            run_schedule(args.interval, args.keep, args.db)
+    except BackupError as e:
+        print(f"✗ {e}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Leaderboard memory and latency benchmark.
+
+Builds a throwaway database of synthetic players (5,000 by default) and
+times each leaderboard strategy, reporting the median latency and the
+peak Python memory (tracemalloc) of one run. The ORM strategies are the
+previous implementations, kept here as the baseline:
+  - full leaderboard, all three stats: SQL window ranks loading ORM Player
+    and Team objects vs compact rows ranked in Python (rankings.rank_rows)
+  - one team's leaderboard: the same SQL ranks with ORM objects vs compact
+    rows (rankings.team_rankings)
+  - home page top ten of goals and assists: ORDER BY ... LIMIT with ORM
+    objects vs compact rows (rankings.top_rows) vs a heapq top ten over
+    every compact row
+
+Usage:
+    python benchmark_leaderboard.py
+    python benchmark_leaderboard.py --players 20000 --teams 200 --repeat 10
+"""
+import argparse
+import heapq
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import aliased, contains_eager, joinedload
+
+from models import db, Tournament, Team, Player, PlayerStat
+from rankings import LEADERBOARD_STATS, load_rows, rank_rows, team_rankings, top_rows
+
+
+def seed(players, teams):
+    """One tournament of `teams` teams sharing `players` players with random totals"""
+    rng = random.Random(42)
+    tournament = Tournament(name='Benchmark')
+    db.session.add(tournament)
+    db.session.flush()
+    db.session.execute(insert(Team), [{'tournament_id': tournament.id, 'name': f'Team {i}'}
+                                      for i in range(teams)])
+    team_ids = [team_id for (team_id,) in db.session.query(Team.id)]
+    db.session.execute(insert(Player), [{'tournament_id': tournament.id, 'name': f'Player {i}',
+                                         'team_id': team_ids[i % teams], 'jersey_number': i % 100}
+                                        for i in range(players)])
+    db.session.execute(insert(PlayerStat), [{
+        'player_id': player_id, 'tournament_id': tournament.id, 'goals': rng.randint(0, 30),
+        'assists': rng.randint(0, 30), 'blocks': rng.randint(0, 15), 'turnovers': 0, 'callahans': 0, 'drops': 0,
+    } for (player_id,) in db.session.query(Player.id)])
+    db.session.commit()
+    return tournament.id, team_ids[0]
+
+
+def orm_ranked(column, tournament_id, team_id=None):
+    """Baseline leaderboard: SQL ranks, one dict per player holding ORM Player and Team"""
+    value = func.coalesce(getattr(PlayerStat, column), 0)
+    team_rank = func.rank().over(partition_by=Player.team_id, order_by=value.desc())
+    if team_id is None:
+        global_rank = func.rank().over(order_by=value.desc())
+    else:
+        ahead = aliased(PlayerStat)
+        global_rank = select(func.count()).where(
+            ahead.tournament_id == tournament_id, getattr(ahead, column) > value
+        ).scalar_subquery() + 1
+    query = db.session.query(Player, value, global_rank, team_rank) \
+        .join(Player.team) \
+        .outerjoin(PlayerStat, PlayerStat.player_id == Player.id) \
+        .options(contains_eager(Player.team)) \
+        .filter(Player.tournament_id == tournament_id)
+    if team_id is not None:
+        query = query.filter(Player.team_id == team_id)
+    return [{'player': player, 'team': player.team, 'value': total,
+             'global_rank': overall, 'team_rank': within_team}
+            for player, total, overall, within_team in query.order_by(value.desc(), Player.id)]
+
+
+def orm_top(column, tournament_id, limit=10):
+    """Baseline home page top ten: ORDER BY ... LIMIT loading ORM Player and Team"""
+    value = func.coalesce(column, 0)
+    return db.session.query(Player, value).outerjoin(PlayerStat, PlayerStat.player_id == Player.id) \
+        .filter(Player.tournament_id == tournament_id) \
+        .options(joinedload(Player.team)).order_by(value.desc(), Player.id).limit(limit).all()
+
+
+def heap_top(rows, stat, limit=10):
+    """Top ten by a bounded heap over every compact row"""
+    return heapq.nsmallest(limit, rows, key=lambda row: (-getattr(row, stat), row.player_id))
+
+
+def measure(fn, repeat):
+    """(median seconds, peak bytes) of fn()"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark leaderboard computation strategies')
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--teams', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per strategy')
+    args = parser.parse_args(argv)
+
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    try:
+        with app.app_context():
+            db.create_all()
+            tournament_id, team_id = seed(args.players, args.teams)
+            cases = [
+                ('full leaderboard', 'ORM + SQL ranks',
+                 lambda: [orm_ranked(stat, tournament_id) for stat in LEADERBOARD_STATS]),
+                ('full leaderboard', 'compact rows',
+                 lambda: [rank_rows(rows, stat) for rows in [load_rows(tournament_id)]
+                          for stat in LEADERBOARD_STATS]),
+                ('one team', 'ORM + SQL ranks',
+                 lambda: [orm_ranked(stat, tournament_id, team_id) for stat in LEADERBOARD_STATS]),
+                ('one team', 'compact + SQL ranks',
+                 lambda: [team_rankings(stat, tournament_id, team_id) for stat in LEADERBOARD_STATS]),
+                ('home top 10', 'ORM + SQL LIMIT',
+                 lambda: [orm_top(column, tournament_id) for column in (PlayerStat.goals, PlayerStat.assists)]),
+                ('home top 10', 'compact + SQL LIMIT',
+                 lambda: [top_rows(tournament_id, stat) for stat in ('goals', 'assists')]),
+                ('home top 10', 'compact rows + heapq',
+                 lambda: [heap_top(rows, stat) for rows in [load_rows(tournament_id)]
+                          for stat in ('goals', 'assists')]),
+            ]
+            print(f"{args.players} players in {args.teams} teams, median of {args.repeat} runs")
+            print(f"{'view':<18} {'strategy':<22} {'latency':>10} {'peak memory':>12}")
+            for view, strategy, fn in cases:
+                seconds, peak = measure(fn, args.repeat)
+                print(f"{view:<18} {strategy:<22} {seconds * 1000:>8.1f}ms {peak / 1024:>9.0f} KiB")
+    finally:
+        os.remove(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Per-match box scores.
+
+One grouped query over Score produces goals, assists, defenses (blocks and
+callahans), turnovers (throwaways and drops) and plus/minus per player;
+names and jersey numbers come from the cached team rosters, so every
+rostered player of both teams gets a line without joining Player. Results
+are cached per match and reused until the match version changes (it is
+bumped whenever a scoring event is added or undone); roster changes clear
+the cache.
+"""
+import threading
+
+from sqlalchemy import select, literal, union_all, func, case
+
+from metrics import REGISTRY as METRICS
+from rosters import get_roster
+from models import (db, Score, GOAL_ACTIONS, ACTION_BLOCK, ACTION_CALLAHAN,
+                    ACTION_TURNOVER, ACTION_DROP)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _events_query(match_id):
+    """One row per stat credit: (player_id, goals, assists, blocks, turnovers)"""
+    credits = select(
+        Score.player_id.label('player_id'),
+        case((Score.action_type.in_(GOAL_ACTIONS), Score.points), else_=0).label('goals'),
+        literal(0).label('assists'),
+        case((Score.action_type.in_((ACTION_BLOCK, ACTION_CALLAHAN)), 1), else_=0).label('blocks'),
+        case((Score.action_type.in_((ACTION_TURNOVER, ACTION_DROP)), 1), else_=0).label('turnovers'),
+    ).where(Score.match_id == match_id)
+    assists = select(Score.assist_player_id, literal(0), literal(1), literal(0), literal(0)) \
+        .where(Score.match_id == match_id, Score.assist_player_id.isnot(None))
+    return union_all(credits, assists).subquery('events')
+
+
+def compute_box_score(match):
+    """Run the grouped query and shape it into per-team player lines"""
+    events = _events_query(match.id)
+    totals = {player_id: totals for player_id, *totals in db.session.execute(
+        select(
+            events.c.player_id,
+            func.sum(events.c.goals),
+            func.sum(events.c.assists),
+            func.sum(events.c.blocks),
+            func.sum(events.c.turnovers),
+        ).group_by(events.c.player_id)
+    )}
+
+    lines = {}
+    for team_id in (match.team1_id, match.team2_id):
+        lines[team_id] = []
+        for player in sorted(get_roster(team_id), key=lambda player: (player['name'], player['id'])):
+            goals, assists, blocks, turnovers = totals.get(player['id'], (0, 0, 0, 0))
+            lines[team_id].append({
+                'player_id': player['id'],
+                'name': player['name'],
+                'jersey_number': player['jersey_number'],
+                'goals': goals,
+                'assists': assists,
+                'defenses': blocks,
+                'turnovers': turnovers,
+                'plus_minus': goals + assists + blocks - turnovers,
+            })
+
+    return {
+        'match_id': match.id,
+        'version': match.version or 0,
+        'team1_players': lines[match.team1_id],
+        'team2_players': lines[match.team2_id],
+    }
+
+
+def get_box_score(match):
+    """Box score for a match, recomputed only when its version changes"""
+    version = match.version or 0
+    with _cache_lock:
+        cached = _cache.get(match.id)
+    if cached and cached['version'] == version:
+        METRICS.cache_result('boxscore', True)
+        return cached
+
+    METRICS.cache_result('boxscore', False)
+    box = compute_box_score(match)
+    with _cache_lock:
+        _cache[match.id] = box
+    return box
+
+
+def invalidate_box_scores():
+    """Drop all cached box scores, e.g. after a roster change"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def player_stats(box):
+    """Flatten a box score into {player_id: line} for template lookups"""
+    return {line['player_id']: line for line in box['team1_players'] + box['team2_players']}
@@ -4,6 +4,7 @@ Run this script to automatically generate and add players to all teams
 """
 from app import app, db
 from models import Team, Player
+from tournaments import scoped
 import random
 
 # Configuration
@@ -40,8 +41,8 @@ def generate_player_name(existing_names):
 def bulk_add_players():
     """Add players to all teams"""
     with app.app_context():
-        # Get all teams
-        teams = Team.query.all()
+        # Get the current tournament's teams
+        teams = scoped(Team).all()
         
         if not teams:
             print("❌ No teams found! Please add teams first.")
@@ -72,6 +73,7 @@ def bulk_add_players():
                 jersey_number = str(i + 1)
                 
                 player = Player(
+                    tournament_id=team.tournament_id,
                     name=player_name,
                     team_id=team.id,
                     jersey_number=jersey_number
@@ -0,0 +1,177 @@
+"""
+Match clock and time caps.
+
+A live match's caps follow from its start_time:
+  - soft cap after duration_minutes: the game goes to the leading score + 1
+    (never above max_score)
+  - hard cap HARD_CAP_MINUTES later: the game is recapped the same way and
+    the point in progress ends it, unless that point leaves the score tied
+
+The clock scheduler applies each cap once, when it falls due, recording
+cap_state and cap_target on the match and bumping its version, so polling
+clients pick the transition up on their next request. Payloads carry the
+cap times as epoch seconds and browsers count down locally; no request
+recomputes the clock. A hard-capped match left untied HARD_CAP_GRACE_MINUTES
+after the cap (its last point was never entered) is completed automatically.
+
+The app runs the scheduler in a background thread under `python app.py`;
+next to a WSGI server run it as its own process:
+    python clock.py           # apply caps every CLOCK_INTERVAL seconds
+    python clock.py --once    # apply due caps once and exit
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, update
+
+from models import db, Match
+from scheduling import advance_schedule
+
+HARD_CAP_MINUTES = 15
+HARD_CAP_GRACE_MINUTES = 10
+CLOCK_INTERVAL = 5  # seconds between scheduler runs
+
+CAP_SOFT = 'soft'
+CAP_HARD = 'hard'
+
+
+def cap_times(match):
+    """(soft cap, hard cap) datetimes of a started match, else (None, None)"""
+    if match.start_time is None:
+        return None, None
+    soft_cap = match.start_time + timedelta(minutes=match.duration_minutes or 60)
+    return soft_cap, soft_cap + timedelta(minutes=HARD_CAP_MINUTES)
+
+
+def target_score(match):
+    """Score that wins the match, after any cap"""
+    return match.cap_target or match.max_score
+
+
+def match_over(match, now=None):
+    """Whether the point just scored ends the match"""
+    if max(match.team1_score, match.team2_score) >= target_score(match):
+        return True
+    # Past the hard cap the point in progress is the last, unless it ties the game
+    _, hard_cap = cap_times(match)
+    hard_capped = match.cap_state == CAP_HARD or (hard_cap is not None and (now or datetime.now()) >= hard_cap)
+    return hard_capped and match.team1_score != match.team2_score
+
+
+def _epoch(moment):
+    return int(moment.timestamp()) if moment else None
+
+
+def clock_state(match):
+    """Cap times (epoch seconds), current cap and target score, for poll payloads"""
+    soft_cap, hard_cap = cap_times(match)
+    return {
+        'start': _epoch(match.start_time),
+        'soft_cap': _epoch(soft_cap),
+        'hard_cap': _epoch(hard_cap),
+        'cap': match.cap_state,
+        'target': target_score(match),
+    }
+
+
+def compact_clock(match):
+    """clock_state as [start, soft_cap, hard_cap, cap, target]"""
+    return list(clock_state(match).values())
+
+
+def _apply_cap(match, cap):
+    """Record a cap on a live match unless already there; True if it changed"""
+    recap = func.min(func.coalesce(Match.cap_target, Match.max_score),
+                     func.max(Match.team1_score, Match.team2_score) + 1)
+    applied = [CAP_HARD] if cap == CAP_HARD else [CAP_SOFT, CAP_HARD]
+    result = db.session.execute(
+        update(Match)
+        .where(Match.id == match.id, Match.status == 'live',
+               or_(Match.cap_state.is_(None), Match.cap_state.notin_(applied)))
+        .values(cap_state=cap, cap_target=recap, version=func.coalesce(Match.version, 0) + 1)
+        .execution_options(synchronize_session=False))
+    return result.rowcount == 1
+
+
+def apply_caps(now=None):
+    """
+    Apply every cap that has fallen due and complete abandoned hard-capped
+    matches. Needs an app context. Returns (match_id, event) pairs, where
+    event is 'soft', 'hard' or 'completed'.
+    """
+    now = now or datetime.now()
+    events = []
+    completed_tournaments = set()
+    for match in Match.query.filter(Match.status == 'live', Match.start_time.isnot(None)).all():
+        soft_cap, hard_cap = cap_times(match)
+        # Matches already at the due cap are skipped without an UPDATE, so an
+        # idle run takes no write lock
+        if now >= hard_cap:
+            if match.cap_state != CAP_HARD:
+                if _apply_cap(match, CAP_HARD):
+                    events.append((match.id, CAP_HARD))
+            elif (now >= hard_cap + timedelta(minutes=HARD_CAP_GRACE_MINUTES)
+                  and match.team1_score != match.team2_score):
+                result = db.session.execute(
+                    update(Match)
+                    .where(Match.id == match.id, Match.status == 'live', Match.cap_state == CAP_HARD,
+                           Match.team1_score != Match.team2_score)
+                    .values(status='completed', version=func.coalesce(Match.version, 0) + 1)
+                    .execution_options(synchronize_session=False))
+                if result.rowcount == 1:
+                    events.append((match.id, 'completed'))
+                    completed_tournaments.add(match.tournament_id)
+        elif now >= soft_cap and match.cap_state is None and _apply_cap(match, CAP_SOFT):
+            events.append((match.id, CAP_SOFT))
+    if events:
+        db.session.commit()
+    else:
+        db.session.rollback()
+    for tournament_id in completed_tournaments:
+        advance_schedule(tournament_id)
+    return events
+
+
+def start_clock(app, interval=CLOCK_INTERVAL, on_change=None):
+    """
+    Run apply_caps every interval seconds in a daemon thread, calling
+    on_change(*match_ids) with the matches it changed
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    events = apply_caps()
+                if events and on_change:
+                    on_change(*(match_id for match_id, _ in events))
+            except Exception:
+                app.logger.exception('Match clock run failed')
+
+    thread = threading.Thread(target=run, name='match-clock', daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply soft and hard time caps to live matches')
+    parser.add_argument('--once', action='store_true', help='apply due caps once and exit')
+    parser.add_argument('--interval', type=float, default=CLOCK_INTERVAL, help='seconds between runs')
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    while True:
+        with app.app_context():
+            for match_id, event in apply_caps():
+                print(f"✓ Match {match_id}: {event}")
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
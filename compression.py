@@ -0,0 +1,60 @@
+"""
+Response compression for the JSON APIs.
+
+Spectator pages poll the live APIs every few seconds, so JSON responses are
+compressed according to the client's Accept-Encoding: brotli when the
+brotli package (in requirements.txt) is installed, otherwise gzip. Small
+bodies are sent as-is since compressing them costs more than it saves.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Without brotli, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_SIZE = 500
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ('application/json',)
+
+
+def accepted_encodings(header):
+    """Encodings named in an Accept-Encoding header, skipping any with q=0"""
+    encodings = set()
+    for part in (header or '').split(','):
+        name, _, params = part.partition(';')
+        key, _, value = params.strip().partition('=')
+        try:
+            if key.strip() == 'q' and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        if name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def compress_response(response, accept_encoding):
+    """Compress a response body in place if the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < MIN_SIZE:
+        return response
+
+    encodings = accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in encodings:
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in encodings:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
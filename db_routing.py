@@ -0,0 +1,100 @@
+"""
+Read/write routing for database connections.
+
+Public read routes (marked with @read_only) run their queries, including
+those of earlier before_request hooks such as the tournament lookup, on a
+pool of read-only SQLite connections opened with mode=ro. Everything else, including
+every admin mutation, goes through a single writer connection. The database
+runs in WAL mode, so readers see the last committed snapshot and are never
+blocked by a scoring write in progress.
+
+Set READ_ROUTING=0 in the environment to fall back to one shared pool.
+"""
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_BIND = 'read'
+READ_POOL_SIZE = 8
+READ_MAX_OVERFLOW = 8
+
+# Only these methods are routed to the read pool; a form's POST still writes
+READ_METHODS = ('GET', 'HEAD')
+
+# Seconds a connection waits for a lock before failing
+BUSY_TIMEOUT = 30
+
+
+class RoutingSession(Session):
+    """Session that sends queries made inside @read_only views to the read pool"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and has_request_context() and g.get('read_only')
+                and READ_BIND in self._db.engines):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(f):
+    """Run a view's GET (and HEAD) queries on the read-only connection pool"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method in READ_METHODS:
+            g.read_only = True
+        return f(*args, **kwargs)
+    decorated_function.read_only = True
+    return decorated_function
+
+
+def install_read_routing(app):
+    """
+    Mark requests for @read_only views before the other request hooks run,
+    so their queries (e.g. resolving the current tournament) use the read
+    pool rather than holding the writer connection until teardown.
+    Register before any hook that queries the database.
+    """
+    @app.before_request
+    def route_reads():
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, 'read_only', False) and request.method in READ_METHODS:
+            g.read_only = True
+
+
+def configure_routing(app):
+    """
+    Set up the writer and read-only engines in app.config.
+    Call before db.init_app(app); only file-backed SQLite databases are routed.
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    prefix = 'sqlite:///'
+    if not uri.startswith(prefix) or uri in (prefix, f'{prefix}:memory:') or '?' in uri:
+        return False
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 1,
+        'max_overflow': 0,
+        'pool_timeout': BUSY_TIMEOUT,
+        'connect_args': {'timeout': BUSY_TIMEOUT},
+    }
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[READ_BIND] = {
+        'url': f'{prefix}file:{uri[len(prefix):]}?mode=ro&uri=true',
+        'pool_size': READ_POOL_SIZE,
+        'max_overflow': READ_MAX_OVERFLOW,
+        'connect_args': {'timeout': BUSY_TIMEOUT},
+    }
+    return True
+
+
+def install_pragmas(db):
+    """Put the writer in WAL mode and make read connections query-only. Needs an app context."""
+    @event.listens_for(db.engines[None], 'connect')
+    def writer_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.execute('PRAGMA journal_mode = WAL')
+        dbapi_connection.execute('PRAGMA synchronous = NORMAL')
+
+    if READ_BIND in db.engines:
+        @event.listens_for(db.engines[READ_BIND], 'connect')
+        def reader_pragmas(dbapi_connection, connection_record):
+            dbapi_connection.execute('PRAGMA query_only = ON')
@@ -0,0 +1,321 @@
+"""
+Tournament-wide stats export for offline analysis.
+
+Matches, scoring events (with player, team and assist names) and spirit
+scores are read in fixed-size chunks with a single SQLite cursor and written
+as they are read, so memory use stays bounded however large the tournament
+gets. Files are written as CSV or, with pyarrow, as Parquet.
+
+Exports are incremental by default: only scores with an id above the last
+exported id, and spirit scores created or resubmitted after the last
+exported updated_at, are appended. Spirit rows are upserts: a resubmitted
+form is appended again under the same spirit_score_id, and the row with the
+latest updated_at is the current one. Score ids are never reused (the table
+is AUTOINCREMENT), so an event added after an undo is still above the
+watermark. Undos are not propagated: an event exported before it was undone
+stays in the file until the next --full export. Matches change as they are
+played, so they are rewritten in full each time.
+
+Watermarks are kept per format in export_state.json next to the files, with
+each dataset's columns; when those change, that dataset is re-exported in
+full rather than appended under a different header.
+
+Usage:
+    python export.py                          # incremental CSV export
+    python export.py --format parquet         # incremental Parquet export
+    python export.py --format both --full     # re-export everything
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from migrations import DB_PATH
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only Parquet export needs pyarrow
+    pa = pq = None
+
+EXPORT_DIR = 'instance/exports'
+STATE_FILE = 'export_state.json'
+
+# Rows fetched and written per chunk
+CHUNK_SIZE = 5000
+
+FORMATS = ('csv', 'parquet')
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be written"""
+
+
+# Each dataset: columns as (name, type), the query, and how it is watermarked.
+# 'since' queries take the watermark values as parameters.
+DATASETS = {
+    'matches': {
+        'columns': (
+            ('match_id', 'int'), ('tournament_id', 'int'), ('match_date', 'str'), ('location', 'str'), ('status', 'str'),
+            ('match_stage', 'str'), ('pool', 'str'),
+            ('team1_id', 'int'), ('team1_name', 'str'), ('team1_score', 'int'),
+            ('team2_id', 'int'), ('team2_name', 'str'), ('team2_score', 'int'),
+            ('max_score', 'int'), ('total_points_played', 'int'),
+        ),
+        'sql': """
+            SELECT m.id, m.tournament_id, m.match_date, m.location, m.status, m.match_stage, m.pool,
+                   m.team1_id, t1.name, m.team1_score, m.team2_id, t2.name, m.team2_score,
+                   m.max_score, m.total_points_played
+            FROM "match" m
+            LEFT JOIN team t1 ON t1.id = m.team1_id
+            LEFT JOIN team t2 ON t2.id = m.team2_id
+            ORDER BY m.id
+        """,
+        'watermark': None,
+    },
+    'scores': {
+        'columns': (
+            ('score_id', 'int'), ('match_id', 'int'), ('timestamp', 'str'), ('action_type', 'str'),
+            ('points', 'int'), ('player_id', 'int'), ('player_name', 'str'), ('jersey_number', 'str'),
+            ('team_id', 'int'), ('team_name', 'str'), ('assist_player_id', 'int'), ('assist_name', 'str'),
+        ),
+        'sql': """
+            SELECT s.id, s.match_id, s.timestamp,
+                   CASE s.action_type WHEN 1 THEN 'score' WHEN 2 THEN 'block' WHEN 3 THEN 'turnover'
+                                      WHEN 4 THEN 'callahan' WHEN 5 THEN 'drop' END,
+                   s.points, s.player_id, p.name, p.jersey_number, p.team_id, t.name,
+                   s.assist_player_id, a.name
+            FROM score s
+            LEFT JOIN player p ON p.id = s.player_id
+            LEFT JOIN team t ON t.id = p.team_id
+            LEFT JOIN player a ON a.id = s.assist_player_id
+            WHERE s.id > ?
+            ORDER BY s.id
+        """,
+        # Watermark: last exported score id
+        'watermark': ('score_id',),
+        'start': (0,),
+    },
+    'spirit_scores': {
+        'columns': (
+            ('spirit_score_id', 'int'), ('created_at', 'str'), ('updated_at', 'str'), ('match_id', 'int'),
+            ('day', 'str'), ('stage', 'str'),
+            ('giving_team_id', 'int'), ('giving_team_name', 'str'),
+            ('receiving_team_id', 'int'), ('receiving_team_name', 'str'),
+            ('rules_knowledge', 'int'), ('fouls_contact', 'int'), ('fair_mindedness', 'int'),
+            ('positive_attitude', 'int'), ('communication', 'int'),
+            ('mvp_names', 'str'), ('msp_names', 'str'), ('feedback', 'str'),
+        ),
+        'sql': """
+            SELECT ss.id, ss.created_at, ss.updated_at, ss.match_id, ss.day, ss.stage,
+                   ss.giving_team_id, g.name, ss.receiving_team_id, r.name,
+                   ss.rules_knowledge, ss.fouls_contact, ss.fair_mindedness,
+                   ss.positive_attitude, ss.communication,
+                   ss.mvp_names, ss.msp_names, ss.feedback
+            FROM spirit_score ss
+            LEFT JOIN team g ON g.id = ss.giving_team_id
+            LEFT JOIN team r ON r.id = ss.receiving_team_id
+            WHERE (ss.updated_at, ss.id) > (?, ?)
+            ORDER BY ss.updated_at, ss.id
+        """,
+        # Watermark: last exported (updated_at, id); the id breaks timestamp ties
+        'watermark': ('updated_at', 'spirit_score_id'),
+        'start': ('', 0),
+    },
+}
+
+
+def _arrow_schema(dataset):
+    types = {'int': pa.int64(), 'str': pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in DATASETS[dataset]['columns']])
+
+
+def iter_chunks(conn, dataset, since=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield lists of at most chunk_size rows from one read cursor.
+    since is a watermark from watermark_of(); None exports everything.
+    """
+    spec = DATASETS[dataset]
+    params = () if spec['watermark'] is None else tuple(since or spec['start'])
+    cursor = conn.execute(spec['sql'], params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def watermark_of(dataset, row):
+    """Watermark values of an exported row, or None for unwatermarked datasets"""
+    watermark = DATASETS[dataset]['watermark']
+    if watermark is None:
+        return None
+    names = [name for name, _ in DATASETS[dataset]['columns']]
+    return [row[names.index(column)] for column in watermark]
+
+
+def csv_stream(conn, dataset, since=None, header=True):
+    """Yield CSV text one chunk at a time (used for HTTP streaming)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow([name for name, _ in DATASETS[dataset]['columns']])
+    for rows in iter_chunks(conn, dataset, since):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_csv(conn, dataset, path, since=None, append=False):
+    """Write (or append) a dataset to a CSV file. Returns (rows, last watermark)."""
+    new_file = not append or not os.path.exists(path)
+    count, last = 0, None
+    with open(path, 'w' if new_file else 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow([name for name, _ in DATASETS[dataset]['columns']])
+        for rows in iter_chunks(conn, dataset, since):
+            writer.writerows(rows)
+            count += len(rows)
+            last = watermark_of(dataset, rows[-1])
+    return count, last
+
+
+def write_parquet(conn, dataset, path, since=None):
+    """
+    Write a dataset to a Parquet file, one row group per chunk.
+    Returns (rows, last watermark); no file is created when there are no rows.
+    """
+    if pq is None:
+        raise ExportError("Parquet export needs pyarrow (pip install -r requirements.txt)")
+
+    schema = _arrow_schema(dataset)
+    count, last, writer = 0, None, None
+    try:
+        for rows in iter_chunks(conn, dataset, since):
+            if writer is None:
+                writer = pq.ParquetWriter(path, schema)
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            count += len(rows)
+            last = watermark_of(dataset, rows[-1])
+    finally:
+        if writer is not None:
+            writer.close()
+    return count, last
+
+
+# ============ STATE ============
+
+def load_state(export_dir=EXPORT_DIR):
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, export_dir=EXPORT_DIR):
+    path = os.path.join(export_dir, STATE_FILE)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+
+# ============ EXPORT ============
+
+def export_all(db_path=DB_PATH, export_dir=EXPORT_DIR, formats=('csv',), full=False):
+    """
+    Export every dataset in the given formats.
+
+    CSV files are appended to; each incremental Parquet run adds a part file
+    under <dataset>/, so the directory reads as one Arrow dataset. Each
+    format keeps its own watermarks. Returns {dataset: rows written}.
+    """
+    if not os.path.exists(db_path):
+        raise ExportError(f"Database not found: {db_path}")
+    if 'parquet' in formats and pq is None:
+        raise ExportError("Parquet export needs pyarrow (pip install -r requirements.txt)")
+
+    os.makedirs(export_dir, exist_ok=True)
+    state = load_state(export_dir)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, timeout=30)
+    counts = {}
+    try:
+        # One read transaction so every file comes from the same snapshot
+        conn.execute('BEGIN')
+        for fmt in formats:
+            watermarks = {} if full else dict(state.get(fmt, {}))
+            exported_columns = state.setdefault('columns', {}).setdefault(fmt, {})
+            for dataset, spec in DATASETS.items():
+                incremental = spec['watermark'] is not None
+                columns = [name for name, _ in spec['columns']]
+                # Files written with other columns can't be appended to
+                rewrite = full or exported_columns.get(dataset) != columns
+                since = watermarks.get(dataset) if incremental and not rewrite else None
+
+                if fmt == 'csv':
+                    path = os.path.join(export_dir, f'{dataset}.csv')
+                    count, last = write_csv(conn, dataset, path, since, append=incremental and not rewrite)
+                elif incremental:
+                    part_dir = os.path.join(export_dir, dataset)
+                    os.makedirs(part_dir, exist_ok=True)
+                    if rewrite:
+                        for name in os.listdir(part_dir):
+                            if name.endswith('.parquet'):
+                                os.remove(os.path.join(part_dir, name))
+                    count, last = write_parquet(conn, dataset, os.path.join(part_dir, f'part_{stamp}.parquet'), since)
+                else:
+                    path = os.path.join(export_dir, f'{dataset}.parquet')
+                    if os.path.exists(path):
+                        os.remove(path)
+                    count, last = write_parquet(conn, dataset, path)
+
+                counts[dataset] = count
+                exported_columns[dataset] = columns
+                if last is not None:
+                    watermarks[dataset] = last
+                elif rewrite:
+                    watermarks.pop(dataset, None)
+            state[fmt] = watermarks
+    finally:
+        conn.close()
+
+    save_state(state, export_dir)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export matches, scores and spirit scores for analysis')
+    parser.add_argument('--db', default=DB_PATH, help='database path')
+    parser.add_argument('--dest', default=EXPORT_DIR, help='export directory')
+    parser.add_argument('--format', choices=FORMATS + ('both',), default='csv')
+    parser.add_argument('--full', action='store_true', help='ignore watermarks and re-export everything')
+    args = parser.parse_args(argv)
+
+    formats = FORMATS if args.format == 'both' else (args.format,)
+    try:
+        counts = export_all(args.db, args.dest, formats, args.full)
+    except ExportError as e:
+        print(f"✗ {e}")
+        return 1
+
+    for dataset, count in counts.items():
+        print(f"✓ {dataset}: {count} row(s)")
+    print(f"Export written to {args.dest}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
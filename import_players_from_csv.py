@@ -8,14 +8,15 @@ Example CSV content:
 """
 from app import app, db
 from models import Team, Player
+from tournaments import scoped
 import csv
 import sys
 
 def import_from_csv(csv_file):
     """Import players from CSV file"""
     with app.app_context():
-        # Get all teams for lookup
-        teams = {team.name: team for team in Team.query.all()}
+        # Get the current tournament's teams for lookup
+        teams = {team.name: team for team in scoped(Team).all()}
         
         added_count = 0
         skipped_count = 0
@@ -35,6 +36,7 @@ def import_from_csv(csv_file):
                     
                     if team_name in teams:
                         player = Player(
+                            tournament_id=teams[team_name].tournament_id,
                             name=player_name,
                             team_id=teams[team_name].id,
                             jersey_number=jersey
@@ -56,6 +58,7 @@ def import_from_csv(csv_file):
                 
                 if team_name in teams:
                     player = Player(
+                        tournament_id=teams[team_name].tournament_id,
                         name=player_name,
                         team_id=teams[team_name].id,
                         jersey_number=jersey_number
@@ -0,0 +1,186 @@
+"""
+In-memory live match state.
+
+Polls of a live match are answered from memory. For each live match the
+store keeps its scoreboard, box score and a ring buffer of its newest
+RECENT_EVENTS events, with both score payloads (full and compact) built
+once per change rather than once per poll. Scoring routes commit to SQLite
+first and then update the store in the same request (write-through), so a
+poll never shows a point the database doesn't have.
+
+The store is rebuilt from the database on startup, and a match missing from
+it is loaded on its first poll. Every RESYNC_SECONDS a poll also compares a
+few columns of the match row with the stored copy, so changes written by
+another process (python clock.py, a second app worker) are picked up.
+Matches that are not live are built from the database per request and not
+kept.
+"""
+import json
+import threading
+import time
+import zlib
+from collections import deque
+
+from sqlalchemy.orm import joinedload
+
+from boxscore import get_box_score
+from clock import clock_state, compact_clock
+from models import db, Match, Player, Score, ACTION_NAMES
+
+RECENT_EVENTS = 200
+RESYNC_SECONDS = 5
+
+# Match columns whose change (by any process) means the stored state is stale
+SYNC_COLUMNS = (Match.version, Match.status, Match.current_offense_team_id, Match.gender_ratio,
+                Match.start_time, Match.cap_state)
+
+
+def event_row(score):
+    """A scoring event as stored in the ring buffer"""
+    return (score.id, score.player_id, score.player.name, score.player.team.name, score.action_type,
+            score.points, score.timestamp, score.assist_player_id,
+            score.assist_by.name if score.assist_by else None)
+
+
+def recent_events(match_id):
+    """The newest RECENT_EVENTS events of a match, newest first"""
+    scores = Score.query.filter_by(match_id=match_id) \
+        .options(joinedload(Score.player).joinedload(Player.team), joinedload(Score.assist_by)) \
+        .order_by(Score.timestamp.desc()).limit(RECENT_EVENTS).all()
+    return [event_row(score) for score in scores]
+
+
+class LiveState:
+    """One match's scoreboard, events, box score and prebuilt payloads"""
+
+    def __init__(self, match, events, box):
+        self.match_id = match.id
+        self.status = match.status
+        self.sync_key = tuple(getattr(match, column.key) for column in SYNC_COLUMNS)
+        self.events = deque(events, maxlen=RECENT_EVENTS)
+        self.box = box
+        self.checked = time.monotonic()
+        ratios = match.get_current_ratio()
+
+        self.payload = {
+            'team1_score': match.team1_score,
+            'team2_score': match.team2_score,
+            'status': match.status,
+            'current_offense_team_id': match.current_offense_team_id,
+            'current_defense_team_id': match.current_defense_team_id,
+            'total_points': match.total_points_played,
+            'team1_ratio': ratios['team1'],
+            'team2_ratio': ratios['team2'],
+            'clock': clock_state(match),
+            'team1_players': box['team1_players'],
+            'team2_players': box['team2_players'],
+            'scores': [{
+                'id': event_id,
+                'player_name': player_name,
+                'team_name': team_name,
+                'action_type': ACTION_NAMES.get(action, 'unknown'),
+                'points': points,
+                'timestamp': timestamp.strftime('%H:%M:%S'),
+                'assist_by': assist_name,
+            } for event_id, _, player_name, team_name, action, points, timestamp, _, assist_name in self.events],
+        }
+
+        lines = box['team1_players'] + box['team2_players']
+        self.players = {line['player_id']: [line['name'], team_id, line['jersey_number']]
+                        for team_id, team_lines in ((match.team1_id, box['team1_players']),
+                                                    (match.team2_id, box['team2_players']))
+                        for line in team_lines}
+        self.teams = {match.team1_id: match.team1.name, match.team2_id: match.team2.name}
+        self.roster_key = format(zlib.crc32(json.dumps([self.players, self.teams], sort_keys=True).encode()), 'x')
+        self.compact = {
+            'v': 2,
+            'k': self.roster_key,
+            's': [match.team1_score, match.team2_score],
+            'st': match.status,
+            'o': match.current_offense_team_id,
+            'd': match.current_defense_team_id,
+            'n': match.total_points_played,
+            'r': [ratios['team1'], ratios['team2']],
+            'c': compact_clock(match),
+            'b': [[l['player_id'], l['goals'], l['assists'], l['defenses'], l['turnovers'], l['plus_minus']]
+                  for l in lines],
+            'e': [[event_id, player_id, action, points, int(timestamp.timestamp()), assist_id]
+                  for event_id, player_id, _, _, action, points, timestamp, assist_id, _ in self.events],
+        }
+
+    def compact_payload(self, roster_key=None):
+        """The compact payload, with name dictionaries unless the client's roster key is current"""
+        if roster_key == self.roster_key:
+            return self.compact
+        return dict(self.compact, p=self.players, t=self.teams, a=ACTION_NAMES)
+
+
+class LiveStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()   # serialises sync() so concurrent scorers don't drop events
+        self.states = {}   # match id -> LiveState, live matches only
+
+    def _install(self, state):
+        with self.lock:
+            if state.status == 'live':
+                self.states[state.match_id] = state
+            else:
+                self.states.pop(state.match_id, None)
+        return state
+
+    def load(self, match):
+        """Build a match's state from the database (and keep it if live)"""
+        return self._install(LiveState(match, recent_events(match.id), get_box_score(match)))
+
+    def get(self, match_id):
+        """A match's state, or None if there is no such match"""
+        with self.lock:
+            state = self.states.get(match_id)
+        if state is not None:
+            if time.monotonic() - state.checked < RESYNC_SECONDS:
+                return state
+            row = db.session.query(*SYNC_COLUMNS).filter(Match.id == match_id).first()
+            if row is not None and tuple(row) == state.sync_key:
+                state.checked = time.monotonic()
+                return state
+        match = db.session.get(Match, match_id)
+        if match is None:
+            self.discard(match_id)
+            return None
+        return self.load(match)
+
+    def sync(self, match, added=None, removed_id=None):
+        """
+        Update a match's state after a committed change (write-through).
+        added is a new Score; removed_id the id of an undone one.
+        """
+        with self.write_lock:
+            with self.lock:
+                state = self.states.get(match.id)
+            if state is None:
+                return self.load(match)
+            events = [event for event in state.events if event[0] != removed_id]
+            if added is not None:
+                events.insert(0, event_row(added))
+            return self._install(LiveState(match, events, get_box_score(match)))
+
+    def discard(self, *match_ids):
+        with self.lock:
+            for match_id in match_ids:
+                self.states.pop(match_id, None)
+
+    def clear(self):
+        """Drop every state, e.g. after a roster change renames players"""
+        with self.lock:
+            self.states.clear()
+
+    def rebuild(self):
+        """Load every live match, e.g. on startup. Needs an app context."""
+        self.clear()
+        for match in Match.query.filter_by(status='live').all():
+            self.load(match)
+        return len(self.states)
+
+
+LIVE = LiveStore()
@@ -0,0 +1,282 @@
+"""
+Load test simulating a tournament day against a running server.
+
+Spectator threads poll the public pages and live APIs the way the browser
+pollers do: match scores (compact payload, re-sending the roster key),
+the home page, standings and the leaderboard, pausing a few seconds
+between requests. Scorekeeper threads log in as an admin and post
+scoring events to live matches. While the test runs a probe takes the
+SQLite write lock once a second and records how long it had to wait.
+
+Start the server first (e.g. python app.py), with the matches to score set
+to live, then:
+
+    python loadtest.py --matches 1,2 --spectators 200 --scorekeepers 2 --duration 60
+
+Stdlib only; the report gives throughput, latency percentiles and error
+rates per endpoint, plus the lock-wait probe results.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from migrations import DB_PATH
+
+DEFAULT_URL = 'http://127.0.0.1:5011'
+REQUEST_TIMEOUT = 30
+
+# Share of spectator requests going to each kind of page
+SPECTATOR_MIX = (
+    ('match_scores', 0.6),
+    ('home', 0.15),
+    ('standings', 0.15),
+    ('leaderboard', 0.1),
+)
+
+# Scoring events posted by scorekeepers, with their relative frequency
+ACTION_MIX = (('score', 0.4), ('turnover', 0.3), ('block', 0.2), ('drop', 0.1))
+
+LOCK_PROBE_INTERVAL = 1.0
+
+
+class LoadTestError(Exception):
+    """Raised when the test cannot be set up against the server"""
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses instead of following them"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Results:
+    """Thread-safe latency and status samples grouped by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint, seconds, ok):
+        with self.lock:
+            latencies, errors = self.samples.setdefault(endpoint, ([], [0]))
+            latencies.append(seconds)
+            if not ok:
+                errors[0] += 1
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+def timed_request(opener, results, endpoint, url, data=None, ok_statuses=(200,)):
+    """Make one request, record its latency and outcome, and return (status, body)"""
+    request = urllib.request.Request(url, data=data, headers={'Accept-Encoding': 'gzip'})
+    start = time.perf_counter()
+    status, body = None, b''
+    try:
+        with opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+        e.close()
+    except (urllib.error.URLError, OSError):
+        pass
+    results.add(endpoint, time.perf_counter() - start, status in ok_statuses)
+    return status, body
+
+
+# ============ SIMULATED USERS ============
+
+def spectator(base_url, match_ids, results, stop, think):
+    opener = urllib.request.build_opener()
+    roster_keys = {}
+    names, weights = zip(*SPECTATOR_MIX)
+    while not stop.is_set():
+        page = random.choices(names, weights)[0]
+        if page == 'match_scores':
+            match_id = random.choice(match_ids)
+            query = {'v': 2}
+            if match_id in roster_keys:
+                query['r'] = roster_keys[match_id]
+            url = f'{base_url}/api/match/{match_id}/scores?{urllib.parse.urlencode(query)}'
+            status, body = timed_request(opener, results, page, url)
+            if status == 200:
+                try:
+                    roster_keys[match_id] = json.loads(body)['k']
+                except (ValueError, KeyError):
+                    pass
+        else:
+            path = {'home': '/', 'standings': '/standings', 'leaderboard': '/leaderboard'}[page]
+            timed_request(opener, results, page, base_url + path)
+        stop.wait(random.uniform(0.5, 1.5) * think)
+
+
+def login(base_url, username, password):
+    """An opener holding a logged-in admin session"""
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar), NoRedirect)
+    data = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+    try:
+        opener.open(f'{base_url}/admin/login', data=data, timeout=REQUEST_TIMEOUT).close()
+    except urllib.error.HTTPError as e:
+        e.close()
+        if e.code == 302 and 'login' not in e.headers.get('Location', ''):
+            return opener
+    except (urllib.error.URLError, OSError) as e:
+        raise LoadTestError(f"Cannot reach {base_url}: {e}")
+    raise LoadTestError(f"Login failed for admin '{username}'")
+
+
+def match_roster(base_url, match_id):
+    """Player ids of both teams in a match, from the public scores API"""
+    try:
+        with urllib.request.urlopen(f'{base_url}/api/match/{match_id}/scores', timeout=REQUEST_TIMEOUT) as response:
+            data = json.load(response)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise LoadTestError(f"Cannot load match {match_id}: {e}")
+    players = [line['player_id'] for line in data['team1_players'] + data['team2_players']]
+    if not players:
+        raise LoadTestError(f"Match {match_id} has no rostered players")
+    return players
+
+
+def scorekeeper(base_url, opener, match_id, players, results, stop, think):
+    actions, weights = zip(*ACTION_MIX)
+    while not stop.is_set():
+        form = {'player_id': random.choice(players), 'action_type': random.choices(actions, weights)[0]}
+        if form['action_type'] == 'score':
+            form['points'] = 1
+        data = urllib.parse.urlencode(form).encode()
+        # Successful posts redirect back to the scoring page
+        timed_request(opener, results, 'scoring_add', f'{base_url}/admin/scoring/{match_id}/add',
+                      data=data, ok_statuses=(302,))
+        stop.wait(random.uniform(0.5, 1.5) * think)
+
+
+def lock_probe(db_path, waits, stop, interval=LOCK_PROBE_INTERVAL):
+    """Time how long it takes to get the write lock, once per interval"""
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=REQUEST_TIMEOUT)
+    try:
+        while not stop.wait(interval):
+            start = time.perf_counter()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute('ROLLBACK')
+                waits.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                waits.append(None)
+    finally:
+        conn.close()
+
+
+# ============ RUN ============
+
+def run(base_url, match_ids, spectators, scorekeepers, duration, username, password,
+        spectator_think=3.0, scorekeeper_think=5.0, db_path=None):
+    """Run the simulation. Returns (Results, lock waits, elapsed seconds)."""
+    base_url = base_url.rstrip('/')
+    rosters = {match_id: match_roster(base_url, match_id) for match_id in match_ids}
+    openers = [login(base_url, username, password) for _ in range(scorekeepers)]
+
+    results = Results()
+    stop = threading.Event()
+    threads = [threading.Thread(target=spectator, args=(base_url, match_ids, results, stop, spectator_think),
+                                daemon=True) for _ in range(spectators)]
+    for i, opener in enumerate(openers):
+        match_id = match_ids[i % len(match_ids)]
+        threads.append(threading.Thread(target=scorekeeper, daemon=True,
+                                        args=(base_url, opener, match_id, rosters[match_id], results, stop,
+                                              scorekeeper_think)))
+    waits = []
+    if db_path:
+        if not os.path.exists(db_path):
+            raise LoadTestError(f"Database not found for the lock probe: {db_path}")
+        threads.append(threading.Thread(target=lock_probe, args=(db_path, waits, stop), daemon=True))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        stop.wait(duration)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(REQUEST_TIMEOUT)
+    return results, waits, time.perf_counter() - start
+
+
+def report(results, waits, elapsed):
+    """Print per-endpoint throughput, latency and errors, then the lock-wait probe"""
+    print(f"{'endpoint':<14} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'errors':>7}")
+    total, total_errors = 0, 0
+    for endpoint, (latencies, errors) in sorted(results.samples.items()):
+        latencies = sorted(latencies)
+        total += len(latencies)
+        total_errors += errors[0]
+        print(f"{endpoint:<14} {len(latencies):>8} {len(latencies) / elapsed:>7.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {latencies[-1] * 1000:>8.1f} "
+              f"{errors[0] / len(latencies):>7.1%}")
+    if total:
+        print(f"{'total':<14} {total:>8} {total / elapsed:>7.1f} {'':>35} {total_errors / total:>7.1%}")
+
+    if waits:
+        timed = sorted(w for w in waits if w is not None)
+        failed = len(waits) - len(timed)
+        print(f"\nWrite-lock probe: {len(waits)} sample(s), "
+              f"p50 {percentile(timed, 0.5) * 1000:.1f} ms, p95 {percentile(timed, 0.95) * 1000:.1f} ms, "
+              f"max {(timed[-1] if timed else 0) * 1000:.1f} ms, {failed} timed out")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate spectators and scorekeepers against a running server')
+    parser.add_argument('--url', default=DEFAULT_URL, help='server base URL')
+    parser.add_argument('--matches', required=True, help='comma-separated ids of live matches')
+    parser.add_argument('--spectators', type=int, default=100)
+    parser.add_argument('--scorekeepers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=60, help='seconds to run')
+    parser.add_argument('--think', type=float, default=3.0, help='average seconds between spectator polls')
+    parser.add_argument('--score-every', type=float, default=5.0, help='average seconds between scoring events')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--db', default=DB_PATH, help="server's database file, for the lock probe")
+    parser.add_argument('--no-lock-probe', action='store_true')
+    args = parser.parse_args(argv)
+
+    try:
+        match_ids = [int(m) for m in args.matches.split(',') if m.strip()]
+    except ValueError:
+        parser.error('--matches must be comma-separated integers')
+
+    print(f"Running {args.spectators} spectator(s) and {args.scorekeepers} scorekeeper(s) "
+          f"against {args.url} for {args.duration:g}s...")
+    try:
+        results, waits, elapsed = run(args.url, match_ids, args.spectators, args.scorekeepers, args.duration,
+                                      args.username, args.password, args.think, args.score_every,
+                                      None if args.no_lock_probe else args.db)
+    except LoadTestError as e:
+        print(f"✗ {e}")
+        return 1
+
+    print()
+    report(results, waits, elapsed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
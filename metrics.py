@@ -0,0 +1,186 @@
+"""
+In-process metrics.
+
+One in-memory registry collects:
+  - request latency histograms per endpoint
+  - database queries per endpoint
+  - cache hits and misses (box scores, compact-payload rosters)
+  - spectators polling each match's live scores in the last POLL_WINDOW seconds
+
+/metrics exposes it in Prometheus text format and the admin dashboard
+renders a panel from the same registry; no external service is needed.
+Values are per process and reset when the app restarts.
+"""
+import threading
+import time
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A client counts as polling a match if it asked within this many seconds
+POLL_WINDOW = 30
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return 0.0
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound
+        return float('inf')
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}          # endpoint -> Histogram
+        self.queries = {}          # endpoint -> query count
+        self.cache = {}            # cache name -> [hits, misses]
+        self.pollers = {}          # match id -> {client: last seen}
+
+    def observe_request(self, endpoint, seconds, queries):
+        with self.lock:
+            self.latency.setdefault(endpoint, Histogram()).observe(seconds)
+            self.queries[endpoint] = self.queries.get(endpoint, 0) + queries
+
+    def cache_result(self, name, hit):
+        with self.lock:
+            counts = self.cache.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def poll(self, match_id, client):
+        with self.lock:
+            self.pollers.setdefault(match_id, {})[client] = time.monotonic()
+
+    def active_pollers(self):
+        """{match_id: clients seen in the last POLL_WINDOW seconds}, pruning the rest"""
+        cutoff = time.monotonic() - POLL_WINDOW
+        with self.lock:
+            for match_id in list(self.pollers):
+                clients = {c: t for c, t in self.pollers[match_id].items() if t >= cutoff}
+                if clients:
+                    self.pollers[match_id] = clients
+                else:
+                    del self.pollers[match_id]
+            return {match_id: len(clients) for match_id, clients in self.pollers.items()}
+
+    def summary(self):
+        """Per-endpoint latency and query figures, slowest p95 first, for the dashboard"""
+        with self.lock:
+            endpoints = [{
+                'endpoint': endpoint,
+                'requests': histogram.count,
+                'avg_ms': round(histogram.sum / histogram.count * 1000, 1),
+                'p50_ms': _bound_ms(histogram.quantile(0.5)),
+                'p95_ms': _bound_ms(histogram.quantile(0.95)),
+                'queries_per_request': round(self.queries.get(endpoint, 0) / histogram.count, 1),
+            } for endpoint, histogram in self.latency.items() if histogram.count]
+            caches = [{
+                'name': name,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            } for name, (hits, misses) in sorted(self.cache.items())]
+        endpoints.sort(key=lambda e: (e['p95_ms'] is not None, -(e['p95_ms'] or 0), -e['avg_ms']))
+        return {'endpoints': endpoints, 'caches': caches, 'pollers': self.active_pollers()}
+
+    def prometheus(self):
+        """The registry in Prometheus text exposition format"""
+        pollers = self.active_pollers()
+        lines = [
+            '# HELP frisbee_request_duration_seconds Request latency by endpoint',
+            '# TYPE frisbee_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            for endpoint, histogram in sorted(self.latency.items()):
+                label = f'endpoint="{endpoint}"'
+                for bound, total in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'frisbee_request_duration_seconds_bucket{{{label},le="{le}"}} {total}')
+                lines.append(f'frisbee_request_duration_seconds_sum{{{label}}} {histogram.sum:.6f}')
+                lines.append(f'frisbee_request_duration_seconds_count{{{label}}} {histogram.count}')
+
+            lines += ['# HELP frisbee_db_queries_total Database queries by endpoint',
+                      '# TYPE frisbee_db_queries_total counter']
+            lines += [f'frisbee_db_queries_total{{endpoint="{endpoint}"}} {count}'
+                      for endpoint, count in sorted(self.queries.items())]
+
+            lines += ['# HELP frisbee_cache_hits_total Cache hits by cache',
+                      '# TYPE frisbee_cache_hits_total counter']
+            lines += [f'frisbee_cache_hits_total{{cache="{name}"}} {hits}'
+                      for name, (hits, _) in sorted(self.cache.items())]
+            lines += ['# HELP frisbee_cache_misses_total Cache misses by cache',
+                      '# TYPE frisbee_cache_misses_total counter']
+            lines += [f'frisbee_cache_misses_total{{cache="{name}"}} {misses}'
+                      for name, (_, misses) in sorted(self.cache.items())]
+
+        lines += ['# HELP frisbee_match_pollers Clients polling live scores in the last '
+                  f'{POLL_WINDOW}s, by match',
+                  '# TYPE frisbee_match_pollers gauge']
+        lines += [f'frisbee_match_pollers{{match_id="{match_id}"}} {count}'
+                  for match_id, count in sorted(pollers.items())]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _bound_ms(seconds):
+    """A bucket bound in whole milliseconds, or None for the +Inf bucket"""
+    return None if seconds == float('inf') else round(seconds * 1000)
+
+
+def install_metrics(app):
+    """Time every request; register before other hooks so their time is included"""
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.query_count = 0
+
+    @app.after_request
+    def record_request(response):
+        if 'metrics_start' in g and request.endpoint != 'static':
+            REGISTRY.observe_request(request.endpoint or 'unknown',
+                                     time.perf_counter() - g.metrics_start, g.query_count)
+        return response
+
+
+def count_queries(db):
+    """Count each request's database queries. Needs an app context."""
+    def count_query(*args):
+        if has_app_context() and 'query_count' in g:
+            g.query_count += 1
+
+    for engine in db.engines.values():
+        event.listen(engine, 'before_cursor_execute', count_query)
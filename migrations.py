@@ -0,0 +1,449 @@
+"""
+Versioned schema migrations for the SQLite database.
+
+Each migration runs inside a single transaction. Table rebuilds copy rows
+with INSERT ... SELECT inside SQLite, so data never round-trips through
+Python and memory use does not grow with tournament size. The applied
+version is recorded in the schema_version table.
+
+Usage:
+    python migrations.py            # upgrade to the latest version
+    python migrations.py --status   # show applied and pending migrations
+"""
+import sqlite3
+import os
+import sys
+from datetime import datetime
+
+DB_PATH = 'instance/frisbee.db'
+
+# Registered migrations as (version, description, function), in order
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration function under a schema version"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+# ============ HELPERS ============
+
+def table_exists(conn, table):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def index_exists(conn, index):
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)
+    ).fetchone()
+    return row is not None
+
+
+def add_column(conn, table, column, ddl):
+    """Add a column unless it already exists (e.g. created by db.create_all)"""
+    if column in table_columns(conn, table):
+        return False
+    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+    return True
+
+
+def rebuild_table(conn, table, create_sql, column_map=None, indexes=()):
+    """
+    Rebuild a table with a new definition, following SQLite's documented
+    create/copy/drop/rename procedure.
+
+    create_sql must contain a {table} placeholder for the new table name.
+    Columns present in both the old and new table are copied as-is;
+    column_map maps new column names to SQL expressions over the old row.
+    indexes are CREATE INDEX statements re-applied after the rename.
+    """
+    new_table = f'{table}__new'
+    conn.execute(f'DROP TABLE IF EXISTS "{new_table}"')
+    conn.execute(create_sql.format(table=f'"{new_table}"'))
+
+    old_columns = set(table_columns(conn, table))
+    column_map = dict(column_map or {})
+    for column in table_columns(conn, new_table):
+        if column not in column_map and column in old_columns:
+            column_map[column] = f'"{column}"'
+
+    targets = ', '.join(f'"{c}"' for c in column_map)
+    sources = ', '.join(column_map.values())
+    conn.execute(f'INSERT INTO "{new_table}" ({targets}) SELECT {sources} FROM "{table}"')
+    conn.execute(f'DROP TABLE "{table}"')
+    conn.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+
+    for index_sql in indexes:
+        conn.execute(index_sql)
+
+    violations = conn.execute(f'PRAGMA foreign_key_check("{table}")').fetchall()
+    if violations:
+        raise RuntimeError(
+            f"Rebuilt table '{table}' has {len(violations)} foreign key violation(s); "
+            f"first offending rowid: {violations[0][1]}"
+        )
+
+
+# ============ MIGRATIONS ============
+
+@migration(1, 'Add match_stage column to match')
+def add_match_stage(conn):
+    if table_exists(conn, 'match'):
+        add_column(conn, 'match', 'match_stage', "VARCHAR(30) DEFAULT 'Pool Stage'")
+
+
+@migration(2, 'Cascade team_seeding rows when a team is deleted')
+def team_seeding_cascade(conn):
+    if not table_exists(conn, 'team_seeding'):
+        return
+
+    foreign_keys = conn.execute('PRAGMA foreign_key_list("team_seeding")').fetchall()
+    # Row layout: (id, seq, table, from, to, on_update, on_delete, match)
+    if any(fk[3] == 'team_id' and fk[6] == 'CASCADE' for fk in foreign_keys):
+        return
+
+    rebuild_table(conn, 'team_seeding', """
+        CREATE TABLE {table} (
+            id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            seeding_rank INTEGER NOT NULL,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            UNIQUE (team_id),
+            FOREIGN KEY(team_id) REFERENCES team (id) ON DELETE CASCADE
+        )
+    """)
+
+
+@migration(3, 'Add pool column to match')
+def add_match_pool(conn):
+    if table_exists(conn, 'match'):
+        add_column(conn, 'match', 'pool', 'VARCHAR(10)')
+
+
+@migration(4, 'Add version column to match')
+def add_match_version(conn):
+    if table_exists(conn, 'match'):
+        add_column(conn, 'match', 'version', 'INTEGER DEFAULT 0')
+
+
+@migration(5, 'Store score action types as integer codes and add player_stat totals')
+def score_action_codes(conn):
+    if not table_exists(conn, 'score'):
+        return
+
+    column_types = {row[1]: row[2].upper() for row in conn.execute('PRAGMA table_info("score")')}
+    if column_types.get('action_type') != 'INTEGER':
+        unknown = conn.execute("""
+            SELECT COUNT(*) FROM score
+            WHERE action_type NOT IN ('score', 'defense', 'block', 'turnover', 'callahan', 'drop')
+        """).fetchone()[0]
+        if unknown:
+            raise RuntimeError(f"{unknown} score row(s) have an unrecognised action_type")
+
+        # Codes: 1 score, 2 block, 3 turnover, 4 callahan, 5 drop
+        rebuild_table(conn, 'score', """
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL,
+                match_id INTEGER NOT NULL,
+                player_id INTEGER NOT NULL,
+                action_type INTEGER NOT NULL,
+                points INTEGER,
+                assist_player_id INTEGER,
+                timestamp DATETIME,
+                PRIMARY KEY (id),
+                FOREIGN KEY(match_id) REFERENCES "match" (id),
+                FOREIGN KEY(player_id) REFERENCES player (id),
+                FOREIGN KEY(assist_player_id) REFERENCES player (id)
+            )
+        """, column_map={
+            'action_type': """CASE action_type
+                WHEN 'score' THEN 1 WHEN 'defense' THEN 2 WHEN 'block' THEN 2
+                WHEN 'turnover' THEN 3 WHEN 'callahan' THEN 4 WHEN 'drop' THEN 5 END""",
+            'points': "CASE WHEN action_type IN ('score', 'callahan') THEN points ELSE 0 END",
+        })
+
+    if not index_exists(conn, 'ix_score_match_id'):
+        conn.execute('CREATE INDEX ix_score_match_id ON score (match_id)')
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_stat (
+            player_id INTEGER NOT NULL,
+            goals INTEGER NOT NULL,
+            assists INTEGER NOT NULL,
+            blocks INTEGER NOT NULL,
+            turnovers INTEGER NOT NULL,
+            callahans INTEGER NOT NULL,
+            drops INTEGER NOT NULL,
+            PRIMARY KEY (player_id),
+            FOREIGN KEY(player_id) REFERENCES player (id) ON DELETE CASCADE
+        )
+    """)
+    for column in ('goals', 'assists', 'blocks'):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS ix_player_stat_{column} ON player_stat ({column})')
+
+    conn.execute('DELETE FROM player_stat')
+    conn.execute("""
+        INSERT INTO player_stat (player_id, goals, assists, blocks, turnovers, callahans, drops)
+        SELECT player_id, SUM(goals), SUM(assists), SUM(blocks), SUM(turnovers), SUM(callahans), SUM(drops)
+        FROM (
+            SELECT player_id,
+                   CASE WHEN action_type IN (1, 4) THEN points ELSE 0 END AS goals,
+                   0 AS assists,
+                   CASE WHEN action_type IN (2, 4) THEN 1 ELSE 0 END AS blocks,
+                   CASE WHEN action_type = 3 THEN 1 ELSE 0 END AS turnovers,
+                   CASE WHEN action_type = 4 THEN 1 ELSE 0 END AS callahans,
+                   CASE WHEN action_type = 5 THEN 1 ELSE 0 END AS drops
+            FROM score
+            UNION ALL
+            SELECT assist_player_id, 0, 1, 0, 0, 0, 0 FROM score WHERE assist_player_id IS NOT NULL
+        ) AS events
+        WHERE player_id IN (SELECT id FROM player)
+        GROUP BY player_id
+    """)
+
+
+@migration(6, 'One spirit score per team per match, indexed for lookups')
+def spirit_score_unique(conn):
+    if not table_exists(conn, 'spirit_score'):
+        return
+
+    # Keep the latest submission from each team for each match
+    conn.execute("""
+        DELETE FROM spirit_score
+        WHERE id NOT IN (SELECT MAX(id) FROM spirit_score GROUP BY match_id, giving_team_id)
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ix_spirit_score_match_giving_team
+        ON spirit_score (match_id, giving_team_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS ix_spirit_score_receiving_team_id
+        ON spirit_score (receiving_team_id)
+    """)
+
+
+@migration(7, 'Index player.team_id for team-filtered leaderboards')
+def player_team_index(conn):
+    if table_exists(conn, 'player'):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_player_team_id ON player (team_id)")
+
+
+# Tables scoped to a tournament, with the indexes that lead with tournament_id
+TOURNAMENT_INDEXES = {
+    'team': ('CREATE UNIQUE INDEX IF NOT EXISTS ix_team_tournament_name ON team (tournament_id, name)',),
+    'player': ('CREATE INDEX IF NOT EXISTS ix_player_tournament_team ON player (tournament_id, team_id)',),
+    'match': ('CREATE INDEX IF NOT EXISTS ix_match_tournament_status ON "match" (tournament_id, status)',
+              'CREATE INDEX IF NOT EXISTS ix_match_tournament_date ON "match" (tournament_id, match_date)'),
+    'team_seeding': ('CREATE INDEX IF NOT EXISTS ix_team_seeding_tournament_rank '
+                     'ON team_seeding (tournament_id, seeding_rank)',),
+    'spirit_score': ('CREATE INDEX IF NOT EXISTS ix_spirit_score_tournament_receiving '
+                     'ON spirit_score (tournament_id, receiving_team_id)',),
+    'schedule_slot': ('CREATE INDEX IF NOT EXISTS ix_schedule_slot_tournament_id ON schedule_slot (tournament_id)',),
+    'player_stat': tuple(f'CREATE INDEX IF NOT EXISTS ix_player_stat_tournament_{column} '
+                         f'ON player_stat (tournament_id, {column})' for column in ('goals', 'assists', 'blocks')),
+}
+
+
+@migration(8, 'Scope teams, players, matches and spirit scores to a tournament')
+def tournament_scoping(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tournament (
+            id INTEGER NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            start_date DATE,
+            status VARCHAR(20) NOT NULL,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            UNIQUE (name)
+        )
+    """)
+    tables = [table for table in TOURNAMENT_INDEXES if table_exists(conn, table)]
+    for table in tables:
+        add_column(conn, table, 'tournament_id', 'INTEGER REFERENCES tournament (id)')
+
+    # Everything recorded so far belongs to one tournament
+    has_rows = any(conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone() for table in tables)
+    tournament_id = conn.execute('SELECT MIN(id) FROM tournament').fetchone()[0]
+    if has_rows and tournament_id is None:
+        tournament_id = conn.execute(
+            "INSERT INTO tournament (name, status, created_at) VALUES ('Tournament', 'active', ?)",
+            (datetime.utcnow().isoformat(sep=' '),)
+        ).lastrowid
+    if tournament_id is not None:
+        for table in tables:
+            if table == 'player':
+                source = '(SELECT tournament_id FROM team WHERE team.id = player.team_id)'
+            elif table == 'player_stat':
+                source = '(SELECT tournament_id FROM player WHERE player.id = player_stat.player_id)'
+            else:
+                source = str(tournament_id)
+            conn.execute(f'UPDATE "{table}" SET tournament_id = COALESCE({source}, ?) '
+                         f'WHERE tournament_id IS NULL', (tournament_id,))
+
+    # Team names were unique across the whole database; now only within a tournament
+    if 'team' in tables and any(row[2] for row in conn.execute('PRAGMA index_list("team")')
+                                if row[3] == 'u'):
+        rebuild_table(conn, 'team', """
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL,
+                tournament_id INTEGER NOT NULL,
+                name VARCHAR(100) NOT NULL,
+                created_at DATETIME,
+                PRIMARY KEY (id),
+                FOREIGN KEY(tournament_id) REFERENCES tournament (id)
+            )
+        """)
+
+    for index in ('ix_player_stat_goals', 'ix_player_stat_assists', 'ix_player_stat_blocks',
+                  'ix_spirit_score_receiving_team_id'):
+        conn.execute(f'DROP INDEX IF EXISTS {index}')
+    for table in tables:
+        for index_sql in TOURNAMENT_INDEXES[table]:
+            conn.execute(index_sql)
+
+
+@migration(9, 'Add time cap columns to match')
+def add_match_caps(conn):
+    if table_exists(conn, 'match'):
+        add_column(conn, 'match', 'cap_state', 'VARCHAR(10)')
+        add_column(conn, 'match', 'cap_target', 'INTEGER')
+
+
+@migration(10, 'Never reuse score ids (AUTOINCREMENT) so incremental exports see every event')
+def score_autoincrement(conn):
+    if not table_exists(conn, 'score'):
+        return
+    create_sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'score'").fetchone()[0]
+    if 'AUTOINCREMENT' in create_sql.upper():
+        return
+
+    # Copying the rows in sets sqlite_sequence to the highest existing id
+    rebuild_table(conn, 'score', """
+        CREATE TABLE {table} (
+            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            action_type INTEGER NOT NULL,
+            points INTEGER,
+            assist_player_id INTEGER,
+            timestamp DATETIME,
+            FOREIGN KEY(match_id) REFERENCES "match" (id),
+            FOREIGN KEY(player_id) REFERENCES player (id),
+            FOREIGN KEY(assist_player_id) REFERENCES player (id)
+        )
+    """, indexes=['CREATE INDEX ix_score_match_id ON score (match_id)'])
+
+
+@migration(11, 'Track when spirit scores were last resubmitted, for incremental exports')
+def spirit_score_updated_at(conn):
+    if not table_exists(conn, 'spirit_score'):
+        return
+    add_column(conn, 'spirit_score', 'updated_at', 'DATETIME')
+    conn.execute('UPDATE spirit_score SET updated_at = created_at WHERE updated_at IS NULL')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_spirit_score_updated ON spirit_score (updated_at, id)')
+
+
+# ============ RUNNER ============
+
+def _connect(db_path):
+    # Autocommit mode so transactions are controlled explicitly below
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER NOT NULL PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at DATETIME
+        )
+    """)
+    return conn
+
+
+def current_version(conn):
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def upgrade(db_path=DB_PATH, target=None, verbose=True):
+    """
+    Apply all pending migrations up to target (default: latest).
+    Returns the list of versions applied.
+    """
+    if not os.path.exists(db_path):
+        if verbose:
+            print("Database not found. No migration needed - it will be created with the current schema.")
+        return []
+
+    conn = _connect(db_path)
+    applied = []
+    try:
+        version = current_version(conn)
+        for mig_version, description, func in MIGRATIONS:
+            if mig_version <= version or (target is not None and mig_version > target):
+                continue
+
+            # Foreign keys must be toggled outside a transaction; table
+            # rebuilds would otherwise cascade through DROP TABLE
+            conn.execute('PRAGMA foreign_keys = OFF')
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                func(conn)
+                conn.execute(
+                    'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                    (mig_version, description, datetime.utcnow().isoformat(sep=' '))
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.execute('PRAGMA foreign_keys = ON')
+
+            applied.append(mig_version)
+            if verbose:
+                print(f"✓ Applied migration {mig_version}: {description}")
+    finally:
+        conn.close()
+
+    return applied
+
+
+def status(db_path=DB_PATH):
+    """Return (current_version, pending migrations)"""
+    if not os.path.exists(db_path):
+        return 0, list(MIGRATIONS)
+    conn = _connect(db_path)
+    try:
+        version = current_version(conn)
+    finally:
+        conn.close()
+    return version, [m for m in MIGRATIONS if m[0] > version]
+
+
+if __name__ == '__main__':
+    if '--status' in sys.argv:
+        version, pending = status()
+        print(f"Schema version: {version} (latest: {latest_version()})")
+        for mig_version, description, _ in pending:
+            print(f"  pending {mig_version}: {description}")
+    else:
+        print("Running database migrations...")
+        applied = upgrade()
+        if not applied:
+            print("✓ Database schema is up to date.")
+        print("Migration complete!")
@@ -1,8 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Compact integer codes stored in Score.action_type
+ACTION_SCORE = 1
+ACTION_BLOCK = 2
+ACTION_TURNOVER = 3
+ACTION_CALLAHAN = 4
+ACTION_DROP = 5
+
+ACTION_NAMES = {
+    ACTION_SCORE: 'score',
+    ACTION_BLOCK: 'block',
+    ACTION_TURNOVER: 'turnover',
+    ACTION_CALLAHAN: 'callahan',
+    ACTION_DROP: 'drop',
+}
+ACTION_CODES = {name: code for code, name in ACTION_NAMES.items()}
+ACTION_CODES['defense'] = ACTION_BLOCK  # Older forms posted 'defense' for a block
+
+# Events that put points on the board
+GOAL_ACTIONS = (ACTION_SCORE, ACTION_CALLAHAN)
 
 class Admin(db.Model):
     """Admin user model for authentication"""
@@ -20,10 +41,27 @@ class Admin(db.Model):
     def __repr__(self):
         return f'<Admin {self.username}>'
 
+class Tournament(db.Model):
+    """A tournament/event; teams, players, matches and spirit scores each belong to one"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    start_date = db.Column(db.Date, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, completed, archived
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Tournament {self.name}>'
+
 class Team(db.Model):
     """Team model"""
+    # Team names are unique within a tournament
+    __table_args__ = (
+        db.Index('ix_team_tournament_name', 'tournament_id', 'name', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False, unique=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -36,9 +74,14 @@ class Team(db.Model):
 
 class Player(db.Model):
     """Player model"""
+    __table_args__ = (
+        db.Index('ix_player_tournament_team', 'tournament_id', 'team_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)  # Same as the team's
     name = db.Column(db.String(100), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False, index=True)
     jersey_number = db.Column(db.String(10))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -60,7 +103,13 @@ class Player(db.Model):
 
 class Match(db.Model):
     """Match model"""
+    __table_args__ = (
+        db.Index('ix_match_tournament_status', 'tournament_id', 'status'),
+        db.Index('ix_match_tournament_date', 'tournament_id', 'match_date'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
     team1_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     team2_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     team1_score = db.Column(db.Integer, default=0)
@@ -69,13 +118,17 @@ class Match(db.Model):
     location = db.Column(db.String(200))
     status = db.Column(db.String(20), default='scheduled')  # scheduled, live, completed
     match_stage = db.Column(db.String(30), default='Pool Stage')  # Pool Stage, Cross Pool, 5th Place Game, 3rd Place Game, Finals
+    pool = db.Column(db.String(10), nullable=True)  # Pool name ('A', 'B', ...) for pool stage matches
     duration_minutes = db.Column(db.Integer, default=60)  # 60, 75, or 90 minutes
     max_score = db.Column(db.Integer, default=15)  # Game to X points
     start_time = db.Column(db.DateTime, nullable=True)  # When match actually started
+    cap_state = db.Column(db.String(10), nullable=True)  # None, 'soft' or 'hard' once a time cap applies (see clock.py)
+    cap_target = db.Column(db.Integer, nullable=True)  # Winning score after a cap; max_score until then
     current_offense_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)  # Team on offense
     current_defense_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)  # Team on defense
     gender_ratio = db.Column(db.String(20), nullable=True)  # '4:3_boys' or '4:3_girls'
     total_points_played = db.Column(db.Integer, default=0)  # Track total points for ratio switching
+    version = db.Column(db.Integer, default=0)  # Bumped on every scoring change; keys cached box scores
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -124,23 +177,62 @@ class Match(db.Model):
 
 class Score(db.Model):
     """Score model - individual scoring events"""
+    # Ids are never reused after an undo, so incremental exports miss no event
+    __table_args__ = {'sqlite_autoincrement': True}
+    
     id = db.Column(db.Integer, primary_key=True)
-    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False, index=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    action_type = db.Column(db.String(20), nullable=False)  # 'score', 'defense'
-    points = db.Column(db.Integer, default=1)
-    assist_player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=True)  # Only for 'score' type
+    action_type = db.Column(db.Integer, nullable=False)  # ACTION_* code
+    points = db.Column(db.Integer, default=1)  # 0 for events that are not goals
+    assist_player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=True)  # Only for ACTION_SCORE
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship for assist
     assist_by = db.relationship('Player', foreign_keys=[assist_player_id], backref=db.backref('assists', lazy='dynamic'), post_update=True)
     
+    @property
+    def action_name(self):
+        return ACTION_NAMES.get(self.action_type, 'unknown')
+    
+    @property
+    def is_goal(self):
+        return self.action_type in GOAL_ACTIONS
+    
     def __repr__(self):
-        return f'<Score {self.player.name} - {self.action_type}>'
+        return f'<Score {self.player.name} - {self.action_name}>'
+
+class PlayerStat(db.Model):
+    """Running per-player totals, updated as scoring events are added or undone"""
+    # Leaderboards rank within a tournament
+    __table_args__ = (
+        db.Index('ix_player_stat_tournament_goals', 'tournament_id', 'goals'),
+        db.Index('ix_player_stat_tournament_assists', 'tournament_id', 'assists'),
+        db.Index('ix_player_stat_tournament_blocks', 'tournament_id', 'blocks'),
+    )
+    
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id', ondelete='CASCADE'), primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'))  # Copied from the player
+    goals = db.Column(db.Integer, nullable=False, default=0)
+    assists = db.Column(db.Integer, nullable=False, default=0)
+    blocks = db.Column(db.Integer, nullable=False, default=0)  # Includes callahans
+    turnovers = db.Column(db.Integer, nullable=False, default=0)
+    callahans = db.Column(db.Integer, nullable=False, default=0)
+    drops = db.Column(db.Integer, nullable=False, default=0)
+    
+    player = db.relationship('Player', backref=db.backref('stat', uselist=False, lazy=True, cascade='all, delete-orphan'))
+    
+    def __repr__(self):
+        return f'<PlayerStat {self.player_id}: {self.goals}G {self.assists}A {self.blocks}D>'
 
 class TeamSeeding(db.Model):
     """Initial tournament seeding/ranking for teams"""
+    __table_args__ = (
+        db.Index('ix_team_seeding_tournament_rank', 'tournament_id', 'seeding_rank'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
     team_id = db.Column(db.Integer, db.ForeignKey('team.id', ondelete='CASCADE'), nullable=False, unique=True)
     seeding_rank = db.Column(db.Integer, nullable=False)  # 1 for 1st seed, 2 for 2nd seed, etc.
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -150,9 +242,19 @@ class TeamSeeding(db.Model):
     def __repr__(self):
         return f'<TeamSeeding {self.team.name} - Seed #{self.seeding_rank}>'
 
+SPIRIT_CRITERIA = ('rules_knowledge', 'fouls_contact', 'fair_mindedness', 'positive_attitude', 'communication')
+
 class SpiritScore(db.Model):
     """Spirit of the Game scores awarded to teams after matches"""
+    # One submission per team per match; resubmitting replaces it
+    __table_args__ = (
+        db.Index('ix_spirit_score_match_giving_team', 'match_id', 'giving_team_id', unique=True),
+        db.Index('ix_spirit_score_tournament_receiving', 'tournament_id', 'receiving_team_id'),
+        db.Index('ix_spirit_score_updated', 'updated_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
     match_id = db.Column(db.Integer, db.ForeignKey('match.id'), nullable=False)
     giving_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)  # Team giving the score
     receiving_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)  # Team receiving the score
@@ -175,8 +277,9 @@ class SpiritScore(db.Model):
     # Feedback
     feedback = db.Column(db.Text, nullable=True)
     
-    # Timestamp
+    # Timestamps; a resubmission keeps created_at and moves updated_at
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     match = db.relationship('Match', backref=db.backref('spirit_scores', lazy=True, cascade='all, delete-orphan'))
@@ -196,3 +299,28 @@ class SpiritScore(db.Model):
     
     def __repr__(self):
         return f'<SpiritScore {self.giving_team.name} -> {self.receiving_team.name}>'
+
+class ScheduleSlot(db.Model):
+    """Generated schedule entry; its match is created once both teams are known"""
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False, index=True)
+    stage = db.Column(db.String(30), nullable=False)  # Same values as Match.match_stage
+    pool = db.Column(db.String(10), nullable=True)
+    round_number = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    field = db.Column(db.String(50), nullable=False)
+    duration_minutes = db.Column(db.Integer, default=60)
+    max_score = db.Column(db.Integer, default=15)
+    
+    # Team sources: 'team:<id>', 'seed:<n>' (seed after pool play),
+    # 'winner:<slot_id>' or 'loser:<slot_id>'
+    team1_source = db.Column(db.String(30), nullable=False)
+    team2_source = db.Column(db.String(30), nullable=False)
+    
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id', ondelete='SET NULL'), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    match = db.relationship('Match', backref=db.backref('schedule_slot', uselist=False, lazy=True))
+    
+    def __repr__(self):
+        return f'<ScheduleSlot {self.stage} {self.team1_source} vs {self.team2_source}>'
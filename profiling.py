@@ -0,0 +1,164 @@
+"""
+On-demand request profiling.
+
+Off unless the app starts with PROFILING=1, in which case a request is
+profiled when:
+  - a logged-in admin sends the header X-Profile: 1,
+  - its endpoint is listed in PROFILE_ENDPOINTS (e.g. "standings,upload_excel"), or
+  - it is picked at random at PROFILE_SAMPLE_RATE (e.g. 0.01 for 1%).
+
+Each profile is saved to instance/profiles/ with a JSON file of request
+metadata (method, path, endpoint, status, duration) next to it; only the
+newest MAX_PROFILES are kept. Profiles are cProfile .prof files (open with
+snakeviz or pstats), or pyinstrument HTML reports with PROFILER=pyinstrument
+if pyinstrument is installed.
+
+With PROFILING off no hooks are installed at all, so there is no overhead.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+from datetime import datetime
+
+from flask import g, request, session
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument is optional; cProfile is always available
+    Profiler = None
+
+PROFILE_DIR = 'instance/profiles'
+MAX_PROFILES = 200
+PROFILE_HEADER = 'X-Profile'
+
+# Profile file names: <timestamp>_<endpoint>.<prof|html>
+PROFILE_NAME = re.compile(r'^[\w.-]+\.(prof|html)$')
+
+
+def install_profiling(app, profile_dir=PROFILE_DIR):
+    """Register the profiling hooks if PROFILING=1. Returns whether profiling is on."""
+    app.config.setdefault('PROFILING', os.environ.get('PROFILING') == '1')
+    app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.environ.get('PROFILE_SAMPLE_RATE', 0)))
+    app.config.setdefault('PROFILE_ENDPOINTS', {
+        name.strip() for name in os.environ.get('PROFILE_ENDPOINTS', '').split(',') if name.strip()
+    })
+    use_pyinstrument = os.environ.get('PROFILER') == 'pyinstrument' and Profiler is not None
+    if not app.config['PROFILING']:
+        return False
+
+    def should_profile():
+        if request.endpoint == 'static':
+            return False
+        if request.headers.get(PROFILE_HEADER) == '1' and 'admin_id' in session:
+            return True
+        if request.endpoint in app.config['PROFILE_ENDPOINTS']:
+            return True
+        rate = app.config['PROFILE_SAMPLE_RATE']
+        return rate > 0 and random.random() < rate
+
+    @app.before_request
+    def start_profile():
+        if not should_profile():
+            return
+        profiler = Profiler() if use_pyinstrument else cProfile.Profile()
+        g.profile = {'profiler': profiler, 'start': time.perf_counter()}
+        if use_pyinstrument:
+            profiler.start()
+        else:
+            profiler.enable()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        profiler = profile['profiler']
+        if use_pyinstrument:
+            profiler.stop()
+        else:
+            profiler.disable()
+        save_profile(profiler, {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - profile['start']) * 1000, 1),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        }, profile_dir)
+        return response
+
+    @app.teardown_request
+    def discard_profile(exc):
+        # An unhandled error skips after_request; stop the profiler without saving
+        profile = g.pop('profile', None)
+        if profile is not None:
+            if use_pyinstrument:
+                profile['profiler'].stop()
+            else:
+                profile['profiler'].disable()
+
+    return True
+
+
+def save_profile(profiler, metadata, profile_dir=PROFILE_DIR):
+    """Write a profile and its metadata, then prune the oldest beyond MAX_PROFILES"""
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    endpoint = re.sub(r'[^\w.-]', '_', metadata['endpoint'] or 'unknown')
+    base = f'{stamp}_{endpoint}'
+
+    if isinstance(profiler, cProfile.Profile):
+        name = f'{base}.prof'
+        profiler.dump_stats(os.path.join(profile_dir, name))
+    else:
+        name = f'{base}.html'
+        with open(os.path.join(profile_dir, name), 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+
+    with open(os.path.join(profile_dir, f'{base}.json'), 'w', encoding='utf-8') as f:
+        json.dump(dict(metadata, profile=name), f)
+
+    metadata_files = sorted(n for n in os.listdir(profile_dir) if n.endswith('.json'))
+    for old in metadata_files[:-MAX_PROFILES]:
+        old_base = old[:-len('.json')]
+        for ext in ('.json', '.prof', '.html'):
+            path = os.path.join(profile_dir, old_base + ext)
+            if os.path.exists(path):
+                os.remove(path)
+    return name
+
+
+def list_profiles(limit=None, profile_dir=PROFILE_DIR):
+    """Metadata of saved profiles, slowest first"""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in os.listdir(profile_dir):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(profile_dir, name), encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Being written or pruned by another request
+    profiles.sort(key=lambda p: -p['duration_ms'])
+    return profiles[:limit] if limit else profiles
+
+
+def profile_path(name, profile_dir=PROFILE_DIR):
+    """Path of a saved profile, or None for unknown or unsafe names"""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(profile_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(path, limit=40):
+    """Top functions of a cProfile file by cumulative time, as text"""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,132 @@
+"""
+Leaderboards computed from compact rows.
+
+Projection queries read players as LeaderRow records (__slots__: ids,
+names and stat totals) instead of ORM Player and Team objects:
+  - the full leaderboard loads every player once and rank_rows() ranks
+    them in Python, once per stat
+  - a team's leaderboard reads only that team's players, with global ranks
+    counted in SQL from the (tournament_id, stat) index
+  - the home page's top ten orders by the player_stat column itself, so
+    SQLite walks the (tournament_id, stat) index and stops after ten rows
+benchmark_leaderboard.py compares these with the ORM versions, and with a
+heapq top ten over all rows, at 5,000 players.
+"""
+from operator import attrgetter
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from models import db, Player, PlayerStat, Team
+
+LEADERBOARD_STATS = ('goals', 'assists', 'blocks')
+
+
+class LeaderRow:
+    """One player's leaderboard totals"""
+    __slots__ = ('player_id', 'name', 'team_id', 'team_name') + LEADERBOARD_STATS
+
+    def __init__(self, player_id, name, team_id, team_name, goals, assists, blocks):
+        self.player_id = player_id
+        self.name = name
+        self.team_id = team_id
+        self.team_name = team_name
+        self.goals = goals
+        self.assists = assists
+        self.blocks = blocks
+
+
+class RankedRow:
+    """A LeaderRow's place in one stat's leaderboard; tied players share a rank"""
+    __slots__ = ('row', 'value', 'global_rank', 'team_rank')
+
+    def __init__(self, row, value, global_rank, team_rank):
+        self.row = row
+        self.value = value
+        self.global_rank = global_rank
+        self.team_rank = team_rank
+
+
+def _stat_value(stat):
+    return func.coalesce(getattr(PlayerStat, stat), 0)
+
+
+def _row_query(tournament_id):
+    """LeaderRow columns for a tournament's players"""
+    return select(Player.id, Player.name, Player.team_id, Team.name,
+                  *(_stat_value(stat) for stat in LEADERBOARD_STATS)) \
+        .join(Team, Team.id == Player.team_id) \
+        .outerjoin(PlayerStat, PlayerStat.player_id == Player.id) \
+        .where(Player.tournament_id == tournament_id)
+
+
+def load_rows(tournament_id):
+    """Every player of a tournament as a LeaderRow"""
+    return [LeaderRow(*values) for values in db.session.execute(_row_query(tournament_id))]
+
+
+def rank_rows(rows, stat):
+    """RankedRows for one stat, best first, with global and per-team ranks"""
+    value = attrgetter(stat)
+    team_places = {}   # team_id -> [players seen, last value, its rank]
+    ranked = []
+    global_rank, previous = 0, None
+    for position, row in enumerate(sorted(rows, key=lambda row: (-value(row), row.player_id)), 1):
+        total = value(row)
+        if total != previous:
+            global_rank, previous = position, total
+        place = team_places.get(row.team_id)
+        if place is None:
+            place = team_places[row.team_id] = [0, None, 0]
+        place[0] += 1
+        if total != place[1]:
+            place[1], place[2] = total, place[0]
+        ranked.append(RankedRow(row, total, global_rank, place[2]))
+    return ranked
+
+
+def team_rankings(stat, tournament_id, team_id):
+    """
+    RankedRows for one team's players, best first. Only that team's players
+    are read (via ix_player_team_id); each one's global rank is one more
+    than the number of players ahead of it, counted from the
+    (tournament_id, stat) index.
+    """
+    value = _stat_value(stat)
+    ahead = aliased(PlayerStat)
+    global_rank = select(func.count()).where(
+        ahead.tournament_id == tournament_id, getattr(ahead, stat) > value
+    ).scalar_subquery() + 1
+    team_rank = func.rank().over(order_by=value.desc())
+    query = _row_query(tournament_id).add_columns(global_rank, team_rank) \
+        .where(Player.team_id == team_id).order_by(value.desc(), Player.id)
+    ranked = []
+    for values in db.session.execute(query):
+        row = LeaderRow(*values[:-2])
+        ranked.append(RankedRow(row, getattr(row, stat), values[-2], values[-1]))
+    return ranked
+
+
+def top_rows(tournament_id, stat, limit=10):
+    """
+    The best `limit` players for one stat. Ordering by the player_stat
+    column (not the coalesced outer-join value) lets SQLite read the
+    (tournament_id, stat) index backwards and stop after `limit` rows. Players
+    without totals count as zero, so while the top `limit` reaches zero the
+    outer-join query over every player decides the order instead.
+    """
+    column = getattr(PlayerStat, stat)
+    query = select(Player.id, Player.name, Player.team_id, Team.name,
+                   *(getattr(PlayerStat, name) for name in LEADERBOARD_STATS)) \
+        .select_from(PlayerStat) \
+        .join(Player, Player.id == PlayerStat.player_id) \
+        .join(Team, Team.id == Player.team_id) \
+        .where(PlayerStat.tournament_id == tournament_id) \
+        .order_by(column.desc(), PlayerStat.player_id).limit(limit)
+    rows = [LeaderRow(*values) for values in db.session.execute(query)]
+    if len(rows) == limit and getattr(rows[-1], stat) > 0:
+        return rows
+
+    value = _stat_value(stat)
+    query = _row_query(tournament_id).order_by(value.desc(), Player.id).limit(limit)
+    return [LeaderRow(*values) for values in db.session.execute(query)]
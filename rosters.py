@@ -0,0 +1,52 @@
+"""
+Cached team rosters.
+
+Rosters don't change during a game, yet the live-scoring console re-read
+both teams' players (and each player's team) after every point, and every
+box score joined the player table again. get_roster() keeps each team's
+players in memory as plain dicts, from one query per team, until
+invalidate_rosters() is called by the routes that add or delete players
+or teams and by the Excel import. Entries also expire after ROSTER_TTL
+seconds, so imports run from another process (bulk_add_players.py,
+import_players_from_csv.py) show up without a restart.
+"""
+import threading
+import time
+
+from metrics import REGISTRY as METRICS
+from models import db, Player, Team
+
+ROSTER_TTL = 60
+
+_cache = {}   # team_id -> (loaded at, players)
+_cache_lock = threading.Lock()
+
+
+def get_roster(team_id):
+    """A team's players as dicts (id, name, team_id, team_name, jersey_number), by id"""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(team_id)
+    if cached and now - cached[0] < ROSTER_TTL:
+        METRICS.cache_result('team_roster', True)
+        return cached[1]
+
+    METRICS.cache_result('team_roster', False)
+    rows = db.session.query(Player.id, Player.name, Player.team_id, Team.name, Player.jersey_number) \
+        .join(Team, Team.id == Player.team_id) \
+        .filter(Player.team_id == team_id).order_by(Player.id).all()
+    players = [{'id': player_id, 'name': name, 'team_id': player_team_id, 'team_name': team_name,
+                'jersey_number': jersey_number}
+               for player_id, name, player_team_id, team_name, jersey_number in rows]
+    with _cache_lock:
+        _cache[team_id] = (now, players)
+    return players
+
+
+def invalidate_rosters(*team_ids):
+    """Drop the given teams' cached rosters, or all of them"""
+    with _cache_lock:
+        if not team_ids:
+            _cache.clear()
+        for team_id in team_ids:
+            _cache.pop(team_id, None)
@@ -0,0 +1,349 @@
+"""
+Tournament schedule generator.
+
+Builds a full event from TeamSeeding ranks:
+  - snake-seeded pools playing a round robin ('Pool Stage')
+  - cross-pool games between teams re-seeded by pool finish ('Cross Pool')
+  - placement games for every block of four seeds ('Finals', '3rd Place Game',
+    '5th Place Game', '7th Place Game', ...)
+
+Every game becomes a ScheduleSlot with a start time and field, assigned
+greedily so no field or team is double-booked and no game starts before the
+games it depends on. Pool games get their Match right away; later games
+reference their teams by source ('seed:3', 'winner:12') and
+advance_schedule() creates their matches as results come in. Each
+tournament has its own schedule.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from models import db, Team, Match, TeamSeeding, ScheduleSlot
+from standings import Table
+
+POOL_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class ScheduleError(ValueError):
+    """Raised when a schedule cannot be generated from the given settings"""
+
+
+# ============ PURE PLANNING ============
+
+def snake_pools(team_ids, num_pools):
+    """
+    Distribute seeded team ids into pools in snake order:
+    seeds 1..P go into pools A..P, seeds P+1..2P into pools P..A, and so on.
+    """
+    pools = [[] for _ in range(num_pools)]
+    for index, team_id in enumerate(team_ids):
+        row, col = divmod(index, num_pools)
+        pools[col if row % 2 == 0 else num_pools - 1 - col].append(team_id)
+    return pools
+
+
+def round_robin(team_ids):
+    """
+    Return round robin rounds (lists of pairs) using the circle method.
+    Teams with a bye in a round are simply left out of that round.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for _ in range(n - 1):
+        pairs = [(teams[i], teams[n - 1 - i]) for i in range(n // 2)]
+        rounds.append([p for p in pairs if p[0] is not None and p[1] is not None])
+        # Keep the first team fixed and rotate the rest
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def ordinal(n):
+    if 10 <= n % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f'{n}{suffix}'
+
+
+def placement_stage(place):
+    """Stage name for the game deciding `place` (1 -> 'Finals')"""
+    return 'Finals' if place == 1 else f'{ordinal(place)} Place Game'
+
+
+def build_plan(team_ids, num_pools):
+    """
+    Build the list of games without times. Each game is a dict with
+    key, stage, pool, round_number, team1_source, team2_source, teams (known
+    team ids, for conflict checks) and depends_on (keys of earlier games).
+    """
+    if num_pools < 1:
+        raise ScheduleError('At least one pool is required')
+    if len(team_ids) < 2 * num_pools:
+        raise ScheduleError(f'{len(team_ids)} teams is not enough for {num_pools} pools of two or more')
+
+    games = []
+    pool_game_keys = []
+    pools = snake_pools(team_ids, num_pools)
+
+    # Pool stage: round robins, interleaved by round so pools progress together
+    pool_rounds = [round_robin(pool) for pool in pools]
+    for round_index in range(max(len(r) for r in pool_rounds)):
+        for pool_index, rounds in enumerate(pool_rounds):
+            if round_index >= len(rounds):
+                continue
+            for team1, team2 in rounds[round_index]:
+                key = len(games)
+                games.append({
+                    'key': key,
+                    'stage': 'Pool Stage',
+                    'pool': POOL_NAMES[pool_index],
+                    'round_number': round_index + 1,
+                    'team1_source': f'team:{team1}',
+                    'team2_source': f'team:{team2}',
+                    'teams': (team1, team2),
+                    'depends_on': (),
+                })
+                pool_game_keys.append(key)
+
+    # Bracket: seeds by pool finish, in blocks of four seeds.
+    # Cross pool: s1 v s4, s2 v s3; then winners play for 1st, losers for 3rd.
+    # All cross pool games come first; placement games finish with the final.
+    first_bracket_round = len(pool_rounds[0]) + 1
+    n = len(team_ids)
+    placements = []
+    for block_start in range(1, n + 1, 4):
+        block = list(range(block_start, min(block_start + 4, n + 1)))
+        if len(block) == 4:
+            s1, s2, s3, s4 = block
+            semis = []
+            for a, b in ((s1, s4), (s2, s3)):
+                key = len(games)
+                games.append({
+                    'key': key,
+                    'stage': 'Cross Pool',
+                    'pool': None,
+                    'round_number': first_bracket_round,
+                    'team1_source': f'seed:{a}',
+                    'team2_source': f'seed:{b}',
+                    'teams': (),
+                    'depends_on': tuple(pool_game_keys),
+                })
+                semis.append(key)
+            placements.append((s3, f'loser:@{semis[0]}', f'loser:@{semis[1]}', tuple(semis)))
+            placements.append((s1, f'winner:@{semis[0]}', f'winner:@{semis[1]}', tuple(semis)))
+        elif len(block) >= 2:
+            # Leftover two or three seeds: the top two play for their place
+            placements.append((block[0], f'seed:{block[0]}', f'seed:{block[1]}', tuple(pool_game_keys)))
+
+    for place, source1, source2, depends_on in sorted(placements, key=lambda p: -p[0]):
+        games.append({
+            'key': len(games),
+            'stage': placement_stage(place),
+            'pool': None,
+            'round_number': first_bracket_round + 1,
+            'team1_source': source1,
+            'team2_source': source2,
+            'teams': (),
+            'depends_on': depends_on,
+        })
+
+    return games, pools
+
+
+def assign_slots(games, num_fields):
+    """
+    Give every game a time slot index and field index.
+
+    Games are placed in plan order at the earliest slot where a field is free,
+    after each known team's previous game and after every game it depends on.
+    """
+    if num_fields < 1:
+        raise ScheduleError('At least one field is required')
+
+    fields_used = defaultdict(int)           # slot -> fields taken
+    team_earliest = defaultdict(int)         # team -> first slot it is free
+    game_slot = {}
+
+    for game in games:
+        slot = max((game_slot[k] + 1 for k in game['depends_on']), default=0)
+        slot = max([slot] + [team_earliest[t] for t in game['teams']])
+        while fields_used[slot] >= num_fields:
+            slot += 1
+
+        game['slot'] = slot
+        game['field'] = fields_used[slot]
+        fields_used[slot] += 1
+        game_slot[game['key']] = slot
+        for team_id in game['teams']:
+            team_earliest[team_id] = slot + 1
+
+    return games
+
+
+# ============ DATABASE ============
+
+def seeded_team_ids(tournament_id):
+    """A tournament's team ids in seed order; unseeded teams follow, by name"""
+    rows = db.session.query(Team.id, Team.name, TeamSeeding.seeding_rank) \
+        .outerjoin(TeamSeeding, TeamSeeding.team_id == Team.id) \
+        .filter(Team.tournament_id == tournament_id).all()
+    rows.sort(key=lambda r: (r[2] is None, r[2] or 0, r[1]))
+    return [r[0] for r in rows]
+
+
+def generate_schedule(tournament_id, num_pools, num_fields, start_time, duration_minutes=60,
+                      break_minutes=0, max_score=15, field_names=None):
+    """
+    Generate and store a tournament's whole schedule. Its existing unplayed
+    generated matches and all its slots are replaced. Returns the number of
+    slots created.
+    """
+    team_ids = seeded_team_ids(tournament_id)
+    games, _ = build_plan(team_ids, num_pools)
+    assign_slots(games, num_fields)
+
+    field_names = list(field_names or [])
+    field_names += [f'Field {i + 1}' for i in range(len(field_names), num_fields)]
+    slot_length = timedelta(minutes=duration_minutes + break_minutes)
+
+    clear_schedule(tournament_id)
+
+    slots = []
+    for game in games:
+        slots.append(ScheduleSlot(
+            tournament_id=tournament_id,
+            stage=game['stage'],
+            pool=game['pool'],
+            round_number=game['round_number'],
+            start_time=start_time + game['slot'] * slot_length,
+            field=field_names[game['field']],
+            duration_minutes=duration_minutes,
+            max_score=max_score,
+            team1_source=game['team1_source'],
+            team2_source=game['team2_source'],
+        ))
+    db.session.add_all(slots)
+    db.session.flush()
+
+    # Winner/loser sources were written against plan keys; point them at slot ids
+    for slot in slots:
+        for attr in ('team1_source', 'team2_source'):
+            source = getattr(slot, attr)
+            if ':@' in source:
+                outcome, key = source.split(':@')
+                setattr(slot, attr, f'{outcome}:{slots[int(key)].id}')
+
+    advance_schedule(tournament_id, commit=False)
+    db.session.commit()
+    return len(slots)
+
+
+def clear_schedule(tournament_id):
+    """Remove a tournament's schedule slots and the generated matches not yet played"""
+    slots = ScheduleSlot.query.filter(ScheduleSlot.tournament_id == tournament_id)
+    match_ids = [m for (m,) in slots.with_entities(ScheduleSlot.match_id)
+                 .filter(ScheduleSlot.match_id.isnot(None)).all()]
+    slots.delete(synchronize_session=False)
+    if match_ids:
+        Match.query.filter(Match.id.in_(match_ids), Match.status == 'scheduled') \
+            .delete(synchronize_session=False)
+
+
+def pool_rankings(matches_by_pool, seeds):
+    """Rank teams within each completed pool. Returns {pool: [team_id, ...]}."""
+    rankings = {}
+    for pool, matches in matches_by_pool.items():
+        table = Table()
+        for match in matches:
+            table.add(match.team1_id, match.team2_id, match.team1_score, match.team2_score)
+        rankings[pool] = table.rank(list(table.totals), seeds)
+    return rankings
+
+
+def advance_schedule(tournament_id, commit=True):
+    """
+    Create matches for every slot of a tournament whose teams are now known.
+    Called after generation and whenever a match is completed. Returns
+    matches created.
+    """
+    slots = ScheduleSlot.query.filter(ScheduleSlot.tournament_id == tournament_id).all()
+    if not slots:
+        return 0
+
+    matches = {m.id: m for m in Match.query.filter(
+        Match.id.in_([s.match_id for s in slots if s.match_id])).all()}
+    slots_by_id = {s.id: s for s in slots}
+
+    # Pool results, only for pools whose games are all completed
+    pool_matches = defaultdict(list)
+    open_pools = set()
+    for slot in slots:
+        if slot.stage != 'Pool Stage':
+            continue
+        match = matches.get(slot.match_id)
+        if match and match.status == 'completed':
+            pool_matches[slot.pool].append(match)
+        else:
+            open_pools.add(slot.pool)
+    seeds = dict(db.session.query(TeamSeeding.team_id, TeamSeeding.seeding_rank)
+                 .filter(TeamSeeding.tournament_id == tournament_id).all())
+    rankings = pool_rankings({p: m for p, m in pool_matches.items() if p not in open_pools}, seeds)
+
+    # Post-pool seeds: pool winners first (pool order), then runners-up, ...
+    bracket_seeds = None
+    if not open_pools and rankings:
+        ordered = sorted(
+            (rank, pool, team_id)
+            for pool, team_ids in rankings.items()
+            for rank, team_id in enumerate(team_ids)
+        )
+        bracket_seeds = [team_id for _, _, team_id in ordered]
+
+    def resolve(source):
+        kind, _, value = source.partition(':')
+        if kind == 'team':
+            return int(value)
+        if kind == 'seed':
+            return bracket_seeds[int(value) - 1] if bracket_seeds and int(value) <= len(bracket_seeds) else None
+        if kind in ('winner', 'loser'):
+            source_slot = slots_by_id.get(int(value))
+            match = matches.get(source_slot.match_id) if source_slot else None
+            if not match or match.status != 'completed' or match.team1_score == match.team2_score:
+                return None
+            team1_won = match.team1_score > match.team2_score
+            if kind == 'winner':
+                return match.team1_id if team1_won else match.team2_id
+            return match.team2_id if team1_won else match.team1_id
+        return None
+
+    created = 0
+    # Slots are resolved in id order, which follows the plan's dependency order
+    for slot in sorted(slots, key=lambda s: s.id):
+        if slot.match_id and slot.match_id in matches:
+            continue
+        team1_id, team2_id = resolve(slot.team1_source), resolve(slot.team2_source)
+        if team1_id is None or team2_id is None:
+            continue
+        match = Match(
+            tournament_id=tournament_id,
+            team1_id=team1_id,
+            team2_id=team2_id,
+            match_date=slot.start_time,
+            location=slot.field,
+            duration_minutes=slot.duration_minutes,
+            max_score=slot.max_score,
+            match_stage=slot.stage,
+            pool=slot.pool,
+            status='scheduled'
+        )
+        db.session.add(match)
+        db.session.flush()
+        slot.match_id = match.id
+        matches[match.id] = match
+        created += 1
+
+    if commit:
+        db.session.commit()
+    return created
@@ -0,0 +1,60 @@
+"""
+Batched scoreboards for the home page and venue displays.
+
+One query loads every requested match with both team names and its latest
+scoring event, so a screen showing all live matches makes one request per
+refresh instead of one /api/match/<id>/scores poll per match.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+
+from clock import compact_clock
+from models import db, Match, Team, Score, Player
+
+# Most matches one request may ask for with ?ids=
+MAX_MATCHES = 50
+
+
+def load_scoreboards(tournament_id, match_ids=None):
+    """
+    Rows of (match, team1_name, team2_name, last_score, last_player) for the
+    given match ids, or for the tournament's live matches when none are given.
+    last_score and last_player are None before the first event.
+    """
+    team1, team2 = aliased(Team), aliased(Team)
+    last_event = select(func.max(Score.id)).where(Score.match_id == Match.id) \
+        .correlate(Match).scalar_subquery()
+    query = db.session.query(Match, team1.name, team2.name, Score, Player) \
+        .join(team1, Match.team1_id == team1.id) \
+        .join(team2, Match.team2_id == team2.id) \
+        .outerjoin(Score, Score.id == last_event) \
+        .outerjoin(Player, Player.id == Score.player_id)
+    if match_ids:
+        query = query.filter(Match.id.in_(match_ids[:MAX_MATCHES]))
+    else:
+        query = query.filter(Match.tournament_id == tournament_id, Match.status == 'live')
+    return query.order_by(Match.match_date, Match.id).all()
+
+
+def scoreboard_entry(match, team1_name, team2_name, score, player):
+    """
+    One match's compact scoreboard:
+      i: match id   t: [team1_id, team1_name, team2_id, team2_name]
+      s: [team1_score, team2_score]   st: status   o: offense team id
+      r: [team1_ratio, team2_ratio]   n: points played
+      c: [start, soft_cap, hard_cap, cap, target] (see clock.clock_state)
+      e: [action_code, player_name, team_id, epoch_seconds] of the last event, or None
+    """
+    ratios = match.get_current_ratio()
+    return {
+        'i': match.id,
+        't': [match.team1_id, team1_name, match.team2_id, team2_name],
+        's': [match.team1_score, match.team2_score],
+        'st': match.status,
+        'o': match.current_offense_team_id,
+        'r': [ratios['team1'], ratios['team2']],
+        'n': match.total_points_played,
+        'c': compact_clock(match),
+        'e': [score.action_type, player.name if player else None, player.team_id if player else None,
+              int(score.timestamp.timestamp())] if score else None,
+    }
@@ -0,0 +1,196 @@
+"""
+Standings engine.
+
+Computes overall standings and per-pool tables from completed matches in a
+single pass. Ties on wins are broken with the WFDF cascade, evaluated on a
+mini-league of just the tied teams:
+
+  1. wins in games between the tied teams
+  2. point differential in games between the tied teams
+  3. point differential in all games of the pool
+  4. points scored in games between the tied teams
+  5. points scored in all games of the pool
+  6. original seed
+
+When a step separates some but not all teams, the cascade restarts from
+step 1 for each group that is still tied. Mini-league stats come from a
+head-to-head table built in the same pass, so no step rescans the matches.
+"""
+import re
+from collections import defaultdict
+
+from sqlalchemy import func
+
+from models import db, Team, Match, TeamSeeding, SpiritScore, SPIRIT_CRITERIA
+
+PLACEMENT_STAGE = re.compile(r'^(\d+)(?:st|nd|rd|th) Place Game$')
+
+# A completed match as plain values: (team1_id, team2_id, team1_score, team2_score, stage, pool)
+MATCH_COLUMNS = (Match.team1_id, Match.team2_id, Match.team1_score, Match.team2_score,
+                 Match.match_stage, Match.pool)
+
+
+def placement_for(stage):
+    """Place decided by the winner of a placement game, or None"""
+    if stage == 'Finals':
+        return 1
+    found = PLACEMENT_STAGE.match(stage or '')
+    return int(found.group(1)) if found else None
+
+
+class Table:
+    """Win/loss totals plus a head-to-head table for one group of matches"""
+
+    def __init__(self):
+        self.totals = defaultdict(lambda: [0, 0, 0, 0])   # team -> wins, losses, diff, scored
+        self.h2h = defaultdict(lambda: [0, 0, 0])         # (team, opponent) -> wins, diff, scored
+
+    def add(self, team1_id, team2_id, score1, score2):
+        for team, opp, scored, conceded in ((team1_id, team2_id, score1, score2),
+                                            (team2_id, team1_id, score2, score1)):
+            won = scored > conceded
+            totals = self.totals[team]
+            totals[0] += won
+            totals[1] += not won
+            totals[2] += scored - conceded
+            totals[3] += scored
+            pair = self.h2h[(team, opp)]
+            pair[0] += won
+            pair[1] += scored - conceded
+            pair[2] += scored
+
+    def mini_league(self, team_ids):
+        """(wins, diff, scored) per team, counting only games among team_ids"""
+        stats = {}
+        for team in team_ids:
+            wins = diff = scored = 0
+            for opp in team_ids:
+                if opp != team and (team, opp) in self.h2h:
+                    pair = self.h2h[(team, opp)]
+                    wins += pair[0]
+                    diff += pair[1]
+                    scored += pair[2]
+            stats[team] = (wins, diff, scored)
+        return stats
+
+    def rank(self, team_ids, seeds):
+        """Order team_ids by wins, breaking ties with the cascade"""
+        ordered = []
+        for group in _partition(team_ids, lambda t: self.totals[t][0]):
+            ordered.extend(group if len(group) == 1 else self._break_tie(group, seeds))
+        return ordered
+
+    def _break_tie(self, tied, seeds):
+        mini = self.mini_league(tied)
+        criteria = (
+            lambda t: mini[t][0],
+            lambda t: mini[t][1],
+            lambda t: self.totals[t][2],
+            lambda t: mini[t][2],
+            lambda t: self.totals[t][3],
+        )
+        for criterion in criteria:
+            groups = _partition(tied, criterion)
+            if len(groups) > 1:
+                ordered = []
+                for group in groups:
+                    ordered.extend(group if len(group) == 1 else self._break_tie(group, seeds))
+                return ordered
+        return sorted(tied, key=lambda t: (seeds.get(t, float('inf')), t))
+
+
+def _partition(team_ids, key):
+    """Split team_ids into groups sharing the same key, best (highest) first"""
+    groups = defaultdict(list)
+    for team in team_ids:
+        groups[key(team)].append(team)
+    return [groups[k] for k in sorted(groups, reverse=True)]
+
+
+def compute_standings(matches, team_ids, seeds):
+    """
+    Build standings from completed match tuples (see MATCH_COLUMNS).
+
+    Returns {'overall': [row, ...], 'pools': [{'stage', 'pool', 'rows'}, ...]}
+    where each row is a dict of team_id, wins, losses, point_diff,
+    points_for and final_placement.
+    """
+    overall = Table()
+    groups = defaultdict(Table)
+    placements = {}
+
+    for team1_id, team2_id, score1, score2, stage, pool in matches:
+        stage = stage or 'Pool Stage'
+        overall.add(team1_id, team2_id, score1, score2)
+        if pool or stage == 'Pool Stage':
+            groups[(stage, pool)].add(team1_id, team2_id, score1, score2)
+
+        place = placement_for(stage)
+        if place:
+            team1_won = score1 > score2
+            placements[team1_id] = place if team1_won else place + 1
+            placements[team2_id] = place + 1 if team1_won else place
+
+    def rows(table, ordered):
+        return [{
+            'team_id': team_id,
+            'wins': table.totals[team_id][0],
+            'losses': table.totals[team_id][1],
+            'point_diff': table.totals[team_id][2],
+            'points_for': table.totals[team_id][3],
+            'final_placement': placements.get(team_id),
+        } for team_id in ordered]
+
+    placed = sorted((t for t in team_ids if t in placements), key=lambda t: placements[t])
+    unplaced = overall.rank([t for t in team_ids if t not in placements], seeds)
+
+    pools = []
+    for (stage, pool), table in sorted(groups.items(), key=lambda g: (g[0][0], g[0][1] or '')):
+        pools.append({
+            'stage': stage,
+            'pool': pool,
+            'rows': rows(table, table.rank(list(table.totals), seeds)),
+        })
+
+    return {'overall': rows(overall, placed + unplaced), 'pools': pools}
+
+
+def load_standings(tournament_id):
+    """Load a tournament's completed matches, teams and seeds, and compute standings"""
+    matches = db.session.query(*MATCH_COLUMNS) \
+        .filter(Match.tournament_id == tournament_id, Match.status == 'completed').all()
+    teams = dict(db.session.query(Team.id, Team.name).filter(Team.tournament_id == tournament_id).all())
+    seeds = dict(db.session.query(TeamSeeding.team_id, TeamSeeding.seeding_rank)
+                 .filter(TeamSeeding.tournament_id == tournament_id).all())
+
+    result = compute_standings(matches, list(teams), seeds)
+    for row in result['overall'] + [r for p in result['pools'] for r in p['rows']]:
+        row['team_name'] = teams.get(row['team_id'])
+    return result
+
+
+def load_spirit_standings(tournament_id):
+    """
+    Average spirit scores received per team in a tournament, best first,
+    from one grouped query. Each team gives at most one score per match, so
+    no dedup is needed.
+    """
+    rows = db.session.query(
+        SpiritScore.receiving_team_id, Team.name, func.count(SpiritScore.id),
+        *[func.avg(getattr(SpiritScore, c)) for c in SPIRIT_CRITERIA]
+    ).join(Team, Team.id == SpiritScore.receiving_team_id) \
+        .filter(SpiritScore.tournament_id == tournament_id) \
+        .group_by(SpiritScore.receiving_team_id, Team.name).all()
+
+    standings = []
+    for team_id, team_name, count, *averages in rows:
+        scores = {c: round(avg, 2) for c, avg in zip(SPIRIT_CRITERIA, averages)}
+        standings.append({
+            'team_id': team_id,
+            'team_name': team_name,
+            'match_count': count,
+            'overall': round(sum(scores.values()) / len(SPIRIT_CRITERIA), 2),
+            'scores': scores,
+        })
+    standings.sort(key=lambda x: -x['overall'])
+    return standings
@@ -0,0 +1,65 @@
+// Frisbee Tracker - match clock display
+//
+// Counts down to a match's soft and hard caps in the browser, from the cap
+// times (epoch seconds) in the score payloads, so the server never has to
+// recompute the clock per poll. Cap transitions are applied by the server;
+// onCap(cap, target) fires when a payload reports a new one.
+//
+// Usage:
+//   const clock = createMatchClock({
+//       element: document.getElementById('match-clock'),
+//       targetElement: document.getElementById('score-target'),
+//       onCap: (cap, target) => showNotification(`Hard cap: game to ${target}`),
+//   });
+//   clock.update(data.clock);             // or expandClock(data.c) for compact payloads
+
+function expandClock(compact) {
+    if (!compact) return null;
+    const [start, soft_cap, hard_cap, cap, target] = compact;
+    return { start, soft_cap, hard_cap, cap, target };
+}
+
+function formatClock(seconds) {
+    const minutes = Math.floor(seconds / 60);
+    return minutes + ':' + String(seconds % 60).padStart(2, '0');
+}
+
+// Text for a clock at the current time, e.g. "Soft cap in 12:05"
+function clockText(clock) {
+    if (!clock || !clock.start) return '';
+    const now = Math.floor(Date.now() / 1000);
+    if (now < clock.soft_cap) return 'Soft cap in ' + formatClock(clock.soft_cap - now);
+    if (now < clock.hard_cap) return 'Hard cap in ' + formatClock(clock.hard_cap - now);
+    return 'Hard cap';
+}
+
+function createMatchClock(options) {
+    const settings = Object.assign({
+        element: null,           // shows the countdown
+        targetElement: null,     // shows "Game to N"
+        onCap: () => {},
+    }, options);
+
+    let state = null;
+    let timer = null;
+
+    function render() {
+        if (settings.element) settings.element.textContent = clockText(state);
+    }
+
+    const api = {
+        update(clock) {
+            if (!clock) return;
+            if (state && clock.cap && clock.cap !== state.cap) settings.onCap(clock.cap, clock.target);
+            state = clock;
+            if (settings.targetElement) settings.targetElement.textContent = 'Game to ' + clock.target;
+            render();
+            if (!timer && clock.start) timer = setInterval(render, 1000);
+        },
+        stop() {
+            clearInterval(timer);
+            timer = null;
+        },
+    };
+    return api;
+}
@@ -144,9 +144,17 @@ function startLiveScoreUpdates() {
     const matchId = getMatchIdFromURL();
     if (!matchId) return;
     
-    setInterval(() => {
-        fetchMatchScores(matchId);
-    }, 3000); // Update every 3 seconds
+    // Update every 3 seconds via the shared poller (see poller.js)
+    createPoller({
+        url: `/api/match/${matchId}/scores`,
+        interval: 3000,
+        onData: data => {
+            updateScoreboard(data);
+            updateTimeline(data.scores);
+        },
+        isDone: data => data.status === 'completed',
+        onError: error => console.error('Error fetching scores:', error),
+    }).start();
 }
 
 function getMatchIdFromURL() {
@@ -155,18 +163,6 @@ function getMatchIdFromURL() {
     return matches ? matches[1] : null;
 }
 
-function fetchMatchScores(matchId) {
-    fetch(`/api/match/${matchId}/scores`)
-        .then(response => response.json())
-        .then(data => {
-            updateScoreboard(data);
-            updateTimeline(data.scores);
-        })
-        .catch(error => {
-            console.error('Error fetching scores:', error);
-        });
-}
-
 function updateScoreboard(data) {
     const scoreElements = document.querySelectorAll('.live-score');
     if (scoreElements.length >= 2) {
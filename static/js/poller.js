@@ -0,0 +1,113 @@
+// Frisbee Tracker - shared polling scheduler
+//
+// One request at a time: the next poll is scheduled only after the previous
+// one finishes. Polling pauses while the tab is hidden and resumes with an
+// immediate poll when it becomes visible again. Unchanged or failed responses
+// double the delay (up to maxInterval); a changed response resets it. Polling
+// stops for good once isDone(data) returns true (e.g. the match is completed).
+//
+// Usage:
+//   const poller = createPoller({
+//       url: '/api/match/1/scores',     // string or function returning one
+//       interval: 3000,
+//       onData: data => { ... },
+//       isDone: data => data.status === 'completed',
+//   });
+//   poller.start();
+
+function createPoller(options) {
+    const settings = Object.assign({
+        interval: 3000,          // base delay between polls (ms)
+        maxInterval: 60000,      // backoff ceiling (ms)
+        format: 'json',          // 'json' or 'text'
+        onData: () => {},
+        onError: error => console.error('Polling error:', error),
+        isDone: () => false,
+        skip: () => false,       // return true to skip a poll (e.g. a modal is open)
+    }, options);
+
+    let delay = settings.interval;
+    let timer = null;
+    let inFlight = false;
+    let running = false;
+    let lastBody = null;
+
+    function schedule(ms) {
+        clearTimeout(timer);
+        timer = null;
+        if (running && !document.hidden) {
+            timer = setTimeout(poll, ms);
+        }
+    }
+
+    function backoff() {
+        delay = Math.min(delay * 2, settings.maxInterval);
+    }
+
+    function poll() {
+        timer = null;
+        if (!running || inFlight || document.hidden) return;
+        if (settings.skip()) {
+            schedule(delay);
+            return;
+        }
+
+        inFlight = true;
+        const url = typeof settings.url === 'function' ? settings.url() : settings.url;
+        fetch(url)
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.text();
+            })
+            .then(body => {
+                if (body === lastBody) {
+                    backoff();
+                    return;
+                }
+                lastBody = body;
+                delay = settings.interval;
+                const data = settings.format === 'json' ? JSON.parse(body) : body;
+                settings.onData(data);
+                if (settings.isDone(data)) api.stop();
+            })
+            .catch(error => {
+                backoff();
+                settings.onError(error);
+            })
+            .finally(() => {
+                inFlight = false;
+                schedule(delay);
+            });
+    }
+
+    function onVisibilityChange() {
+        if (document.hidden) {
+            clearTimeout(timer);
+            timer = null;
+        } else if (running) {
+            delay = settings.interval;
+            if (!inFlight) poll();
+        }
+    }
+
+    const api = {
+        start(immediate = false) {
+            if (running) return;
+            running = true;
+            document.addEventListener('visibilitychange', onVisibilityChange);
+            immediate ? poll() : schedule(delay);
+        },
+        stop() {
+            running = false;
+            clearTimeout(timer);
+            timer = null;
+            document.removeEventListener('visibilitychange', onVisibilityChange);
+        },
+        // Poll now at the base rate, e.g. after the user changes something
+        refresh() {
+            delay = settings.interval;
+            if (running && !inFlight) poll();
+        },
+    };
+    return api;
+}
@@ -0,0 +1,111 @@
+"""
+Incremental per-player totals.
+
+Every scoring event adds its deltas to the player's PlayerStat row (and the
+assister's) with a single upsert, and undo subtracts them again, so the
+leaderboards read pre-aggregated, indexed columns instead of re-summing
+Score rows. Deleting a match, player or team removes events wholesale, so
+rebuild_player_stats() recomputes, in SQL, only the players those events
+credited (events_players() collects them before the delete); called with
+no ids it rebuilds every total.
+
+rankings.py reads the leaderboards from those indexed columns.
+"""
+from sqlalchemy import bindparam, or_, select, text
+from sqlalchemy.dialects.sqlite import insert
+
+from models import (db, Player, PlayerStat, Score, ACTION_SCORE, ACTION_BLOCK, ACTION_TURNOVER,
+                    ACTION_CALLAHAN, ACTION_DROP)
+
+STAT_COLUMNS = ('goals', 'assists', 'blocks', 'turnovers', 'callahans', 'drops')
+
+REBUILD_SQL = f"""
+    INSERT INTO player_stat (player_id, tournament_id, goals, assists, blocks, turnovers, callahans, drops)
+    SELECT player_id, player.tournament_id, SUM(goals), SUM(assists), SUM(blocks), SUM(turnovers),
+           SUM(callahans), SUM(drops)
+    FROM (
+        SELECT player_id,
+               CASE WHEN action_type IN ({ACTION_SCORE}, {ACTION_CALLAHAN}) THEN points ELSE 0 END AS goals,
+               0 AS assists,
+               CASE WHEN action_type IN ({ACTION_BLOCK}, {ACTION_CALLAHAN}) THEN 1 ELSE 0 END AS blocks,
+               CASE WHEN action_type = {ACTION_TURNOVER} THEN 1 ELSE 0 END AS turnovers,
+               CASE WHEN action_type = {ACTION_CALLAHAN} THEN 1 ELSE 0 END AS callahans,
+               CASE WHEN action_type = {ACTION_DROP} THEN 1 ELSE 0 END AS drops
+        FROM score
+        UNION ALL
+        SELECT assist_player_id, 0, 1, 0, 0, 0, 0 FROM score WHERE assist_player_id IS NOT NULL
+    ) AS events
+    JOIN player ON player.id = events.player_id
+    {{where}}
+    GROUP BY player_id
+"""
+
+
+def event_deltas(action_type, points):
+    """Stat deltas for the player credited with an event"""
+    if action_type == ACTION_SCORE:
+        return {'goals': points}
+    if action_type == ACTION_CALLAHAN:
+        return {'goals': points, 'blocks': 1, 'callahans': 1}
+    if action_type == ACTION_BLOCK:
+        return {'blocks': 1}
+    if action_type == ACTION_TURNOVER:
+        return {'turnovers': 1}
+    if action_type == ACTION_DROP:
+        return {'drops': 1}
+    return {}
+
+
+def _apply(player_id, deltas, sign):
+    if not player_id or not deltas:
+        return
+    values = {column: 0 for column in STAT_COLUMNS}
+    values.update({column: sign * delta for column, delta in deltas.items()})
+    tournament_id = select(Player.tournament_id).where(Player.id == player_id).scalar_subquery()
+    stmt = insert(PlayerStat).values(player_id=player_id, tournament_id=tournament_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlayerStat.player_id],
+        set_={column: getattr(PlayerStat, column) + stmt.excluded[column] for column in deltas},
+    )
+    db.session.execute(stmt)
+
+
+def record_event(score, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a Score event's contribution to the
+    running totals. Runs in the caller's transaction.
+    """
+    _apply(int(score.player_id), event_deltas(score.action_type, score.points or 0), sign)
+    if score.assist_player_id:
+        _apply(int(score.assist_player_id), {'assists': 1}, sign)
+
+
+def events_players(*player_ids, match_id=None):
+    """
+    Ids of the players credited in, or assisting, the events of a match or
+    of the given players, plus those players. Call before deleting them.
+    """
+    if match_id is not None:
+        condition = Score.match_id == match_id
+    else:
+        condition = or_(Score.player_id.in_(player_ids), Score.assist_player_id.in_(player_ids))
+    ids = set(player_ids)
+    for scorer, assister in db.session.query(Score.player_id, Score.assist_player_id).filter(condition):
+        ids.update(player_id for player_id in (scorer, assister) if player_id)
+    return ids
+
+
+def rebuild_player_stats(player_ids=None):
+    """
+    Recompute totals from the Score table, inside SQLite: for the given
+    players only (deleted ones lose their row), or for everyone
+    """
+    if player_ids is None:
+        db.session.execute(text('DELETE FROM player_stat'))
+        db.session.execute(text(REBUILD_SQL.format(where='')))
+        return
+    if not player_ids:
+        return
+    ids = bindparam('ids', list(player_ids), expanding=True)
+    db.session.execute(text('DELETE FROM player_stat WHERE player_id IN :ids').bindparams(ids))
+    db.session.execute(text(REBUILD_SQL.format(where='WHERE events.player_id IN :ids')).bindparams(ids))
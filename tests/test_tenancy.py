@@ -0,0 +1,121 @@
+"""
+Admin changes must stay inside the tournament that owns the data.
+
+Runs the app against a throwaway database (DATABASE_URL) with three
+tournaments: an archived one and another active one, each holding a match,
+and the selected one, while the admin tries to change the other two's data.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_handle, DB_FILE = tempfile.mkstemp(suffix='.db')
+os.close(_handle)
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from app import app  # noqa: E402
+from models import db, Admin, Tournament, Team, Player, Match, Score  # noqa: E402
+
+
+class OtherTournamentTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with app.app_context():
+            archived = Tournament.query.first()
+            archived.status = 'archived'
+            active = Tournament(name='Next', status='active')
+            db.session.add(active)
+            db.session.flush()
+            team1 = Team(tournament_id=archived.id, name='Old A')
+            team2 = Team(tournament_id=archived.id, name='Old B')
+            db.session.add_all([team1, team2])
+            db.session.flush()
+            player = Player(tournament_id=archived.id, name='Old Player', team_id=team1.id)
+            match = Match(tournament_id=archived.id, team1_id=team1.id, team2_id=team2.id,
+                          match_date=date.today(), status='live')
+            db.session.add_all([player, match])
+
+            other = Tournament(name='Other', status='active')
+            db.session.add(other)
+            db.session.flush()
+            other_teams = [Team(tournament_id=other.id, name=f'Other {n}') for n in 'AB']
+            db.session.add_all(other_teams)
+            db.session.flush()
+            other_match = Match(tournament_id=other.id, team1_id=other_teams[0].id, team2_id=other_teams[1].id,
+                                match_date=date.today(), status='live')
+            db.session.add(other_match)
+
+            # Two matches of the selected tournament, one with an event
+            teams = [Team(tournament_id=active.id, name=f'New {n}') for n in 'AB']
+            db.session.add_all(teams)
+            db.session.flush()
+            scorer = Player(tournament_id=active.id, name='New Player', team_id=teams[0].id)
+            scored, unscored = [Match(tournament_id=active.id, team1_id=teams[0].id, team2_id=teams[1].id,
+                                      match_date=date.today(), status='live') for _ in range(2)]
+            db.session.add_all([scorer, scored, unscored])
+            db.session.flush()
+            score = Score(match_id=scored.id, player_id=scorer.id, action_type=1, points=1)
+            db.session.add(score)
+            db.session.commit()
+            cls.active_id, cls.match_id, cls.player_id = active.id, match.id, player.id
+            cls.other_match_id = other_match.id
+            cls.score_id, cls.unscored_match_id = score.id, unscored.id
+            cls.admin_id = Admin.query.first().id
+
+    @classmethod
+    def tearDownClass(cls):
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        os.remove(DB_FILE)
+
+    def setUp(self):
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['admin_id'] = self.admin_id
+        # Select the active tournament
+        self.client.get('/', query_string={'tournament': self.active_id})
+
+    def test_scoring_refused_for_archived_match(self):
+        response = self.client.post(f'/admin/scoring/{self.match_id}/add',
+                                    data={'player_id': self.player_id, 'action_type': 'score'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/admin/tournaments', response.headers['Location'])
+        with app.app_context():
+            self.assertEqual(Score.query.filter_by(match_id=self.match_id).count(), 0)
+
+    def test_delete_refused_for_archived_match(self):
+        response = self.client.post(f'/admin/matches/delete/{self.match_id}')
+        self.assertEqual(response.status_code, 302)
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Match, self.match_id))
+
+    def test_delete_refused_for_archived_player(self):
+        self.client.post(f'/admin/players/delete/{self.player_id}')
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Player, self.player_id))
+
+    def test_other_tournament_match_not_found(self):
+        response = self.client.post(f'/admin/scoring/{self.other_match_id}/end')
+        self.assertEqual(response.status_code, 404)
+        with app.app_context():
+            self.assertEqual(db.session.get(Match, self.other_match_id).status, 'live')
+
+    def test_undo_needs_event_of_same_match(self):
+        response = self.client.post(f'/admin/scoring/{self.unscored_match_id}/undo/{self.score_id}')
+        self.assertEqual(response.status_code, 404)
+        with app.app_context():
+            self.assertIsNotNone(db.session.get(Score, self.score_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Tournament scoping.
+
+Teams, players, matches, seedings, schedule slots and spirit scores each
+belong to one tournament, and every listing query is filtered to the
+current one through scoped(), so it runs on an index that leads with
+tournament_id and past events never slow down the current one.
+
+The current tournament is picked per request: ?tournament=<id> selects one
+and is remembered in the session; otherwise the latest active tournament
+is used.
+"""
+from flask import g, has_request_context, request, session
+
+from models import db, Tournament, Match, Team, Player
+
+DEFAULT_TOURNAMENT_NAME = 'Tournament'
+
+
+def ensure_tournament():
+    """Create a first tournament if there is none, so new data has a home"""
+    if db.session.query(Tournament.id).first() is None:
+        db.session.add(Tournament(name=DEFAULT_TOURNAMENT_NAME, status='active'))
+        db.session.commit()
+
+
+def default_tournament():
+    """The latest active tournament, else the latest one"""
+    return (Tournament.query.filter_by(status='active').order_by(Tournament.id.desc()).first()
+            or Tournament.query.order_by(Tournament.id.desc()).first())
+
+
+def load_current_tournament():
+    """Resolve this request's tournament into g.tournament (a before_request hook)"""
+    requested = request.args.get('tournament', type=int)
+    tournament = None
+    if requested:
+        tournament = db.session.get(Tournament, requested)
+        if tournament:
+            session['tournament_id'] = tournament.id
+    if tournament is None and session.get('tournament_id'):
+        tournament = db.session.get(Tournament, session['tournament_id'])
+    g.tournament = tournament or default_tournament()
+
+
+def owning_tournament(view_args):
+    """The tournament of the match, team or player a route's URL names, else None"""
+    view_args = view_args or {}
+    for key, model in (('match_id', Match), ('team_id', Team), ('player_id', Player)):
+        if key in view_args:
+            tournament_id = db.session.query(model.tournament_id).filter(model.id == view_args[key]).scalar()
+            return db.session.get(Tournament, tournament_id) if tournament_id else None
+    return None
+
+
+def current_tournament():
+    if has_request_context() and 'tournament' in g:
+        return g.tournament
+    return default_tournament()
+
+
+def current_tournament_id():
+    tournament = current_tournament()
+    return tournament.id if tournament else None
+
+
+def scoped(model):
+    """model.query limited to the current tournament"""
+    return model.query.filter(model.tournament_id == current_tournament_id())
+
+
+def scoped_or_404(model, ident):
+    """A row of the current tournament by id; 404 if it belongs to another"""
+    return scoped(model).filter(model.id == ident).first_or_404()